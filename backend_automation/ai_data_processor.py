@@ -9,34 +9,22 @@ Analyzes notices, events, and other data to create structured database
 import json
 import re
 import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from pathlib import Path
-from typing import Dict, List, Optional
-import PyPDF2
-import requests
-from bs4 import BeautifulSoup
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from http_fetch import fetch, get_fetcher, hash_stream
+from analysis_cache import AnalysisCache, get_analysis_cache
+from rate_limiter import GeminiRateLimiter, estimate_tokens, is_rate_limit_error, is_token_limit_error
+from gemini_client import GeminiClient
+from pdf_extract import ExtractionResult, extract_pdf_text
+from extraction_cache import ExtractionCache
+from html_parsing import parse_html
+from metrics import Metrics, get_metrics
+from near_dup import NearDupIndex, NearDuplicate, get_near_dup_index, minhash_signature, similarity
 
-class CITKDataProcessor:
-    """Process and analyze CITK data for AI consumption"""
-    
-    def __init__(self, gemini_api_key: str):
-        self.api_key = gemini_api_key
-        self.categories = [
-            "Academic", "Scholarship", "Event", "Exam", 
-            "Admission", "Recruitment", "Holiday", "General"
-        ]
-        self.audiences = [
-            "B. Tech", "M. Tech", "PhD", "Faculty", "All Students"
-        ]
-    
-    def analyze_notice_with_ai(self, text: str, url: str, date: str) -> Dict:
-        """Use Gemini to analyze notice content"""
-        import google.generativeai as genai
-        
-        genai.configure(api_key=self.api_key)
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        
-        prompt = f"""
+# Cached analyses are keyed on a hash of this template - editing it re-analyzes
+NOTICE_PROMPT_TEMPLATE = """
 Analyze this CITK notice and extract structured information:
 
 Notice Text:
@@ -63,22 +51,206 @@ Respond in JSON format with:
 
 Only return valid JSON, nothing else.
 """
+
+# Several text notices in one request; the reply is matched back by "id"
+BATCH_PROMPT_TEMPLATE = """
+Analyze each of the following CITK notices and extract structured information.
+
+{notices}
+
+Respond with a JSON array containing one object per notice, in any order:
+[
+    {{
+        "id": "the notice id given above",
+        "is_important": true/false,
+        "category": "Academic/Scholarship/Event/Exam/Admission/Recruitment/Holiday/General",
+        "target_audience": ["B. Tech", "M. Tech", "PhD", "Faculty", "All Students"],
+        "summary": "Brief 1-2 sentence summary",
+        "entities": {{
+            "event_date": "YYYY-MM-DD or null",
+            "deadline": "YYYY-MM-DD or null",
+            "semester": "Which semester(s) affected or null",
+            "department": "Which department(s) or null",
+            "location": "Where if mentioned or null"
+        }},
+        "keywords": ["key", "words", "for", "search"]
+    }}
+]
+
+Only return valid JSON, nothing else.
+"""
+
+class CITKDataProcessor:
+    """Process and analyze CITK data for AI consumption"""
+    
+    def __init__(self,
+                 gemini_api_key: str,
+                 analysis_cache: Optional[AnalysisCache] = None,
+                 rate_limiter: Optional[GeminiRateLimiter] = None,
+                 max_ai_retries: int = 3,
+                 model_name: str = 'gemini-2.0-flash-exp',
+                 generation_config: Optional[Dict] = None,
+                 batch_token_budget: int = 8000,
+                 pdf_char_budget: Optional[int] = 10000,
+                 extraction_cache: Optional[ExtractionCache] = None,
+                 metrics: Optional[Metrics] = None,
+                 near_dup_index: Optional[NearDupIndex] = None):
+        self.api_key = gemini_api_key
+        self.model_name = model_name
+        # Built on the first AI call and reused for every notice after that
+        self.gemini = GeminiClient(gemini_api_key, model_name, generation_config)
+        self.analysis_cache = analysis_cache or get_analysis_cache()
+        self.rate_limiter = rate_limiter or GeminiRateLimiter()
+        self.max_ai_retries = max_ai_retries
+        self.batch_token_budget = batch_token_budget
+        # Only the first 3000 chars reach the model, so long PDFs stop early
+        self.pdf_char_budget = pdf_char_budget
+        self.extraction_cache = extraction_cache or ExtractionCache()
+        self.metrics = metrics or get_metrics()
+        self.near_dups = near_dup_index or get_near_dup_index("notices")
+        self.categories = [
+            "Academic", "Scholarship", "Event", "Exam", 
+            "Admission", "Recruitment", "Holiday", "General"
+        ]
+        self.audiences = [
+            "B. Tech", "M. Tech", "PhD", "Faculty", "All Students"
+        ]
+    
+    def analyze_notice_with_ai(self, text: str, url: str, date: str) -> Dict:
+        """Use Gemini to analyze notice content (cached per content + prompt)"""
+        content_hash = hashlib.sha256(f"{text}\0{url}\0{date}".encode()).hexdigest()
+        cached = self.analysis_cache.get(content_hash, self.model_name, NOTICE_PROMPT_TEMPLATE)
+        if cached is not None:
+            return cached
+
+        prompt = NOTICE_PROMPT_TEMPLATE.format(text=text, date=date, url=url)
         
         try:
-            response = model.generate_content(prompt)
-            # Parse JSON from response
-            json_text = response.text.strip()
-            # Remove markdown code blocks if present
-            if json_text.startswith('```'):
-                json_text = json_text.split('```')[1]
-                if json_text.startswith('json'):
-                    json_text = json_text[4:]
-            
-            return json.loads(json_text)
+            response = self._generate_with_quota(prompt)
+            result = self._parse_json_response(response.text)
+            self.analysis_cache.put(content_hash, self.model_name, NOTICE_PROMPT_TEMPLATE, result)
+            return result
         except Exception as e:
             print(f"AI Analysis failed: {e}")
             return self._fallback_analysis(text)
     
+    def analyze_notices_batch(self, items: List[Dict], batch_size: int = 8, workers: int = 1) -> Dict[str, Dict]:
+        """
+        Analyze many text notices with one request per batch.
+        
+        `items` are dicts with "id", "text", "url" and "date". Batches hold at
+        most `batch_size` notices and `batch_token_budget` estimated tokens,
+        and are halved and retried if the model still rejects them as too
+        long. Any notice missing from a reply, or in a reply that is not valid
+        JSON, gets `_fallback_analysis`. Returns analyses keyed by id.
+        """
+        results = {}
+        pending = []
+        for item in items:
+            cached = self.analysis_cache.get(self._batch_item_hash(item), self.model_name, BATCH_PROMPT_TEMPLATE)
+            if cached is not None:
+                results[item['id']] = cached
+            else:
+                pending.append(item)
+        
+        batches = self._pack_batches(pending, batch_size)
+        if workers > 1 and len(batches) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for batch_result in pool.map(self._analyze_batch, batches):
+                    results.update(batch_result)
+        else:
+            for batch in batches:
+                results.update(self._analyze_batch(batch))
+        return results
+    
+    def _pack_batches(self, items: List[Dict], batch_size: int) -> List[List[Dict]]:
+        batches: List[List[Dict]] = []
+        current: List[Dict] = []
+        used = 0
+        for item in items:
+            cost = estimate_tokens(item['text'])
+            if current and (len(current) >= batch_size or used + cost > self.batch_token_budget):
+                batches.append(current)
+                current, used = [], 0
+            current.append(item)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+    
+    def _analyze_batch(self, batch: List[Dict]) -> Dict[str, Dict]:
+        notices_text = "\n\n".join(
+            f"### Notice id: {item['id']}\nDate: {item['date']}\nURL: {item['url']}\n{item['text']}"
+            for item in batch
+        )
+        prompt = BATCH_PROMPT_TEMPLATE.format(notices=notices_text)
+        
+        try:
+            response = self._generate_with_quota(prompt)
+        except Exception as e:
+            # Halve oversized prompts; a quota 429 would only multiply the requests
+            if len(batch) > 1 and not is_rate_limit_error(e) and is_token_limit_error(e):
+                middle = len(batch) // 2
+                return {**self._analyze_batch(batch[:middle]), **self._analyze_batch(batch[middle:])}
+            print(f"Batch AI Analysis failed: {e}")
+            return {item['id']: self._fallback_analysis(item['text']) for item in batch}
+        
+        try:
+            parsed = self._parse_json_response(response.text)
+        except Exception as e:
+            print(f"Batch AI response was not valid JSON: {e}")
+            parsed = []
+        by_id = {
+            str(entry['id']): entry
+            for entry in (parsed if isinstance(parsed, list) else [])
+            if isinstance(entry, dict) and 'id' in entry
+        }
+        
+        results = {}
+        for item in batch:
+            entry = by_id.get(item['id'])
+            if entry is None:
+                results[item['id']] = self._fallback_analysis(item['text'])
+                continue
+            analysis = {k: v for k, v in entry.items() if k != 'id'}
+            self.analysis_cache.put(self._batch_item_hash(item), self.model_name, BATCH_PROMPT_TEMPLATE, analysis)
+            results[item['id']] = analysis
+        return results
+    
+    @staticmethod
+    def _batch_item_hash(item: Dict) -> str:
+        return hashlib.sha256(f"{item['text']}\0{item['url']}\0{item['date']}".encode()).hexdigest()
+    
+    @staticmethod
+    def _parse_json_response(text: str):
+        """Parse model output, tolerating a markdown code fence around it"""
+        json_text = text.strip()
+        # Remove markdown code blocks if present
+        if json_text.startswith('```'):
+            json_text = json_text.split('```')[1]
+            if json_text.startswith('json'):
+                json_text = json_text[4:]
+        return json.loads(json_text)
+    
+    def _generate_with_quota(self, prompt: str):
+        """generate_content under the RPM/TPM quotas, backing off on 429s"""
+        attempt = 0
+        while True:
+            with self.metrics.time("quota_wait", pipeline="processor"):
+                self.rate_limiter.acquire(estimate_tokens(prompt))
+            try:
+                with self.metrics.time("gemini_generate", pipeline="processor"):
+                    response = self.gemini.generate(prompt)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt >= self.max_ai_retries:
+                    raise
+                self.metrics.inc("gemini_rate_limited", pipeline="processor")
+                self.rate_limiter.record_rate_limited()
+                attempt += 1
+                continue
+            self.rate_limiter.record_success()
+            return response
+    
     def _fallback_analysis(self, text: str) -> Dict:
         """Fallback analysis if AI fails"""
         return {
@@ -92,29 +264,64 @@ Only return valid JSON, nothing else.
     
     def extract_text_from_pdf(self, pdf_path: str) -> str:
         """Extract text from PDF file"""
+        return self._extract_pdf_file(pdf_path)[0]
+    
+    def _extract_pdf_file(self, pdf_path: str) -> Tuple[str, Optional[str]]:
+        """Text of a local PDF and the MD5 of its bytes"""
         try:
             with open(pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text()
-                return text
+                raw_hash = hash_stream(file)
+            return self._extract_pdf_cached(pdf_path, raw_hash), raw_hash
         except Exception as e:
             print(f"PDF extraction failed: {e}")
-            return ""
+            return "", None
+    
+    def _pdf_variant(self) -> str:
+        return f"pdf:{self.pdf_char_budget}"
+    
+    def _extract_pdf_cached(self, source, raw_hash: str) -> str:
+        """Extract a PDF (path or stream) unless text for these exact bytes is cached"""
+        cached = self.extraction_cache.get(raw_hash, self._pdf_variant())
+        if cached is not None:
+            return cached['text']
+        result = extract_pdf_text(source, char_budget=self.pdf_char_budget)
+        self._log_extraction(result)
+        self.extraction_cache.put(raw_hash, self._pdf_variant(), result.text, result.page_count, result.seconds)
+        return result.text
+    
+    @staticmethod
+    def _log_extraction(result: ExtractionResult):
+        note = ", stopped early" if result.truncated else ""
+        print(f"   📄 {result.pages_read}/{result.page_count} pages in {result.seconds:.2f}s via {result.engine}{note}")
     
     def scrape_notice_from_url(self, url: str) -> Dict:
         """Scrape notice content from URL"""
+        # Recently scraped page whose text is still cached: no request at all
+        raw_hash = self.extraction_cache.hash_for_url(url)
+        cached = self.extraction_cache.get(raw_hash, "html") if raw_hash else None
+        if cached is not None:
+            return {"url": url, "text": cached['text'], "scraped_at": datetime.now().isoformat()}
+        
         try:
-            response = requests.get(url, timeout=10)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract text content
-            text = soup.get_text(separator=' ', strip=True)
+            response = fetch(url, timeout=10)
+            raw_hash = hashlib.md5(response.content).hexdigest()
+            cached = self.extraction_cache.get(raw_hash, "html")
+            if cached is not None:
+                text = cached['text']
+            else:
+                started = time.perf_counter()
+                soup = parse_html(response.content)
+                
+                # Extract text content
+                text = soup.get_text(separator=' ', strip=True)[:5000]  # Limit to 5000 chars
+                if response.status_code == 200:
+                    self.extraction_cache.put(raw_hash, "html", text, seconds=time.perf_counter() - started)
+            if response.status_code == 200:
+                self.extraction_cache.record_url(url, raw_hash)
             
             return {
                 "url": url,
-                "text": text[:5000],  # Limit to 5000 chars
+                "text": text,
                 "scraped_at": datetime.now().isoformat()
             }
         except Exception as e:
@@ -129,29 +336,54 @@ Only return valid JSON, nothing else.
                       text_content: Optional[str] = None) -> Dict:
         """Process a single notice and create structured data"""
         
-        # Extract content
-        if pdf_path:
-            content = self.extract_text_from_pdf(pdf_path)
-        elif text_content:
-            content = text_content
-        elif url.endswith('.pdf'):
-            # Download and extract PDF
-            content = self._download_and_extract_pdf(url)
-        else:
-            # Scrape from URL
-            scraped = self.scrape_notice_from_url(url)
-            content = scraped.get('text', '')
+        # Extract content. For PDFs, file_hash is the MD5 of the file itself:
+        # the extracted text stops at pdf_char_budget, so hashing it would
+        # change whenever the budget does.
+        file_hash = None
+        with self.metrics.time("extract", pipeline="processor"):
+            if pdf_path:
+                content, file_hash = self._extract_pdf_file(pdf_path)
+            elif text_content:
+                content = text_content
+            elif url.endswith('.pdf'):
+                # Download and extract PDF
+                content, file_hash = self._download_and_extract_pdf(url)
+            else:
+                # Scrape from URL
+                scraped = self.scrape_notice_from_url(url)
+                content = scraped.get('text', '')
         
-        # Generate unique IDs
-        notice_id = hashlib.md5(f"{title}{date}".encode()).hexdigest()
-        file_hash = hashlib.md5(content.encode()).hexdigest()
+        # Re-uploaded scan or corrected notice: link to the original, no AI call
+        signature = minhash_signature(content)
+        match = self.near_dups.find(signature, exclude=self._notice_id(title, date))
+        if match and match.analysis:
+            return self._build_duplicate_record(title, date, url, content, match, file_hash)
         
         # AI Analysis
-        ai_analysis = self.analyze_notice_with_ai(
-            f"Title: {title}\n\nContent: {content[:3000]}", 
-            url, 
-            date
-        )
+        with self.metrics.time("analyze", pipeline="processor"):
+            ai_analysis = self.analyze_notice_with_ai(
+                self._ai_input(title, content), 
+                url, 
+                date
+            )
+        
+        record = self._build_record(title, date, url, content, ai_analysis, file_hash)
+        self.near_dups.add(record['id'], signature, ai_analysis)
+        return record
+    
+    @staticmethod
+    def _ai_input(title: str, content: str) -> str:
+        return f"Title: {title}\n\nContent: {content[:3000]}"
+    
+    @staticmethod
+    def _notice_id(title: str, date: str) -> str:
+        return hashlib.md5(f"{title}{date}".encode()).hexdigest()
+    
+    def _build_record(self, title: str, date: str, url: str, content: str, ai_analysis: Dict,
+                      file_hash: Optional[str] = None) -> Dict:
+        # Generate unique IDs
+        notice_id = self._notice_id(title, date)
+        file_hash = file_hash or hashlib.md5(content.encode()).hexdigest()
         
         return {
             "id": notice_id,
@@ -166,34 +398,175 @@ Only return valid JSON, nothing else.
             "ai_analysis": ai_analysis
         }
     
-    def _download_and_extract_pdf(self, url: str) -> str:
-        """Download PDF from URL and extract text"""
+    def _build_duplicate_record(self, title: str, date: str, url: str, content: str, match: NearDuplicate,
+                                file_hash: Optional[str] = None) -> Dict:
+        print(f"   🪞 Near-duplicate of {match.doc_id} ({match.similarity:.0%} similar), reusing its analysis")
+        self.metrics.inc("notices_near_duplicate", pipeline="processor")
+        record = self._build_record(title, date, url, content, match.analysis, file_hash)  # type: ignore
+        record["duplicate_of"] = match.doc_id
+        return record
+    
+    def _download_and_extract_pdf(self, url: str) -> Tuple[str, Optional[str]]:
+        """Download PDF from URL and extract text; also returns the MD5 of the PDF"""
+        # Recently downloaded file whose text is still cached: no request at all
+        raw_hash = self.extraction_cache.hash_for_url(url)
+        cached = self.extraction_cache.get(raw_hash, self._pdf_variant()) if raw_hash else None
+        if cached is not None:
+            return cached['text'], raw_hash
+        
         try:
-            response = requests.get(url, timeout=30)
-            temp_path = Path("temp_notice.pdf")
-            temp_path.write_bytes(response.content)
-            text = self.extract_text_from_pdf(str(temp_path))
-            temp_path.unlink()
-            return text
+            # Streamed into a private spooled buffer - no shared temp file
+            with get_fetcher().download(url, timeout=30) as download:
+                self.extraction_cache.record_url(url, download.file_hash)
+                return self._extract_pdf_cached(download.file, download.file_hash), download.file_hash
         except Exception as e:
             print(f"PDF download failed: {e}")
-            return ""
+            return "", None
     
-    def batch_process_notices(self, notices: List[Dict]) -> List[Dict]:
-        """Process multiple notices"""
-        processed = []
+    def batch_process_notices(self, notices: List[Dict], workers: int = 1, batch_size: int = 1) -> List[Dict]:
+        """
+        Process multiple notices. With `workers` > 1, downloads, extraction
+        and AI calls of different notices overlap on a thread pool, while the
+        shared rate limiter keeps Gemini within quota. With `batch_size` > 1,
+        notices that already carry a `text` field are analyzed several per
+        request. Output order always matches input order.
+        """
+        return list(self.iter_process_notices(notices, workers, batch_size, total=len(notices)))
+    
+    def iter_process_notices(self, notices: Iterable[Dict], workers: int = 1, batch_size: int = 1,
+                             done: Optional[Set[str]] = None, total: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Streaming form of batch_process_notices. Notices are pulled from the
+        iterable a window at a time (enough to keep every worker and batch
+        busy) and processed records are yielded in input order as each window
+        finishes. Notices whose id is in `done` - finished by an earlier,
+        interrupted run - are skipped.
+        """
+        started = time.perf_counter()
+        window_size = max(1, workers) * max(1, batch_size) * 2
+        processed = failed = skipped = 0
+        
+        window: List = []
         for i, notice in enumerate(notices):
-            print(f"Processing {i+1}/{len(notices)}: {notice.get('title', 'Unknown')}")
+            if done and self._notice_id(notice.get('title', ''), notice.get('date', '')) in done:
+                skipped += 1
+                continue
+            window.append((i, notice))
+            if len(window) < window_size:
+                continue
+            for record in self._process_window(window, workers, batch_size, total):
+                if record is None:
+                    failed += 1
+                else:
+                    processed += 1
+                    yield record
+            window = []
+        for record in self._process_window(window, workers, batch_size, total):
+            if record is None:
+                failed += 1
+            else:
+                processed += 1
+                yield record
+        
+        if skipped:
+            print(f"⏭️  Skipped {skipped} notices finished by a previous run")
+        self.metrics.inc("notices_processed", processed, pipeline="processor")
+        self.metrics.inc("notices_failed", failed, pipeline="processor")
+        self.metrics.inc("notices_resumed", skipped, pipeline="processor")
+        self.metrics.report("Stage throughput", time.perf_counter() - started, workers, pipeline="processor")
+        if self.rate_limiter.throttled:
+            print(f"   - Gemini 429s absorbed: {self.rate_limiter.throttled}")
+    
+    def _process_window(self, indexed: List, workers: int, batch_size: int,
+                        total: Optional[int]) -> List[Optional[Dict]]:
+        """Records (None for failures) for (position, notice) pairs, in order"""
+        if not indexed:
+            return []
+        
+        def process(item):
+            i, notice = item
+            position = f"{i+1}/{total}" if total else f"{i+1}"
+            print(f"Processing {position}: {notice.get('title', 'Unknown')}")
             try:
-                result = self.process_notice(
+                return self.process_notice(
                     title=notice['title'],
                     date=notice['date'],
                     url=notice['url'],
                     text_content=notice.get('text')
                 )
-                processed.append(result)
             except Exception as e:
                 print(f"Failed to process notice: {e}")
+                return None
+        
+        order = [i for i, _ in indexed]
+        results: Dict[int, Optional[Dict]] = {}
+        if batch_size > 1:
+            text_notices = [(i, n) for i, n in indexed if n.get('text')]
+            results.update(self._process_text_batch(text_notices, batch_size, workers))
+            indexed = [(i, n) for i, n in indexed if i not in results]
+        
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results.update(zip([i for i, _ in indexed], pool.map(process, indexed)))
+        else:
+            results.update((item[0], process(item)) for item in indexed)
+        
+        return [results.get(i) for i in order]
+    
+    def _process_text_batch(self, indexed: List, batch_size: int, workers: int) -> Dict[int, Optional[Dict]]:
+        """
+        Batched-prompt path of batch_process_notices for notices with inline
+        text. Near-duplicates of known notices, or of an earlier notice in
+        the same batch, are linked to their original rather than analyzed.
+        """
+        items = {}
+        signatures = {}
+        copies = {}  # index -> index of the earlier notice it duplicates
+        results: Dict[int, Optional[Dict]] = {i: None for i, _ in indexed}
+        for i, notice in indexed:
+            try:
+                notice_id = self._notice_id(notice['title'], notice['date'])
+                signature = signatures[i] = minhash_signature(notice['text'])
+                match = self.near_dups.find(signature, exclude=notice_id)
+                if match and match.analysis:
+                    results[i] = self._build_duplicate_record(
+                        notice['title'], notice['date'], notice['url'], notice['text'], match
+                    )
+                    continue
+                earlier = next((j for j in items if signature is not None and signatures[j] is not None
+                                and items[j]['id'] != notice_id
+                                and similarity(signatures[j], signature) >= self.near_dups.threshold), None)
+                if earlier is not None:
+                    copies[i] = earlier
+                    continue
+                items[i] = {
+                    "id": notice_id,
+                    "text": self._ai_input(notice['title'], notice['text']),
+                    "url": notice['url'],
+                    "date": notice['date'],
+                }
+            except KeyError as e:
+                print(f"Failed to process notice: {e}")
+        
+        print(f"Analyzing {len(items)} text notices in batches of up to {batch_size}...")
+        with self.metrics.time("analyze_batch", pipeline="processor"):
+            analyses = self.analyze_notices_batch(list(items.values()), batch_size, workers)
+        
+        for i, notice in indexed:
+            if i not in items:
                 continue
+            results[i] = self._build_record(
+                notice['title'], notice['date'], notice['url'], notice['text'],
+                analyses.get(items[i]['id']) or self._fallback_analysis(items[i]['text'])
+            )
+            self.near_dups.add(results[i]['id'], signatures[i], results[i]['ai_analysis'])
         
-        return processed
\ No newline at end of file
+        notices = dict(indexed)
+        for i, j in copies.items():
+            original = results[j]
+            if original is None:
+                continue
+            match = NearDuplicate(original['id'], similarity(signatures[j], signatures[i]), original['ai_analysis'])
+            notice = notices[i]
+            results[i] = self._build_duplicate_record(notice['title'], notice['date'], notice['url'], notice['text'], match)
+        return results
@@ -0,0 +1,113 @@
+"""
+Persistent Cache for Gemini Analyses
+Keyed on (content hash, model name, prompt template hash), so identical
+content is never paid for twice and a prompt change invalidates cleanly
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from local_cache import cache_path
+
+TTL_DAYS = float(os.environ.get("ANALYSIS_CACHE_TTL_DAYS", "90"))
+MAX_ENTRIES = int(os.environ.get("ANALYSIS_CACHE_MAX_ENTRIES", "5000"))
+
+
+def prompt_hash(template: str) -> str:
+    return hashlib.sha256(template.encode('utf-8')).hexdigest()[:16]
+
+
+class AnalysisCache:
+    """SQLite-backed result cache with TTL expiry and LRU eviction"""
+
+    def __init__(self, path: Optional[Path] = None, ttl_days: float = TTL_DAYS, max_entries: int = MAX_ENTRIES):
+        self.path = Path(path) if path else cache_path("analysis_cache.sqlite")
+        self.ttl = ttl_days * 86400
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS analyses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS analyses_lru ON analyses (last_access)")
+
+    @staticmethod
+    def make_key(content_hash: str, model: str, template: str) -> str:
+        raw = f"{content_hash}\0{model}\0{prompt_hash(template)}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, content_hash: str, model: str, template: str) -> Optional[Dict]:
+        key = self.make_key(content_hash, model, template)
+        now = time.time()
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                "SELECT result, created_at FROM analyses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE analyses SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, content_hash: str, model: str, template: str, result: Dict):
+        key = self.make_key(content_hash, model, template)
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO analyses VALUES (?, ?, ?, ?, ?)",
+                (key, model, json.dumps(result), now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float):
+        self.conn.execute("DELETE FROM analyses WHERE created_at < ?", (now - self.ttl,))
+        self.conn.execute("""
+            DELETE FROM analyses WHERE key IN (
+                SELECT key FROM analyses ORDER BY last_access DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,))
+
+    def stats(self) -> Dict:
+        with self._lock:
+            size = self.conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "entries": size,
+        }
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+_default_cache: Optional[AnalysisCache] = None
+_default_lock = threading.Lock()
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """Process-wide cache shared by the live scraper and the batch processor"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = AnalysisCache()
+        return _default_cache
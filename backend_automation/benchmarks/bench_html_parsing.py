@@ -0,0 +1,113 @@
+"""
+HTML Parsing Benchmark
+Times the old full-tree 'html.parser' parse against the strained parse in
+html_parsing, over saved copies of the cit.ac.in listing and notice pages
+
+Record fixtures once (needs network access to cit.ac.in):
+    python backend_automation/benchmarks/bench_html_parsing.py --record
+Then compare offline, as often as needed:
+    python backend_automation/benchmarks/bench_html_parsing.py
+Without recorded pages, --synthetic N builds a listing-shaped page of N rows.
+"""
+
+import argparse
+import importlib.util
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from html_parsing import parse_links, parse_listing_rows  # noqa: E402
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures" / "html"
+
+
+def record_fixtures(notice_pages: int):
+    from citk_scraper import TARGET_URL, parse_listing_row
+    from http_fetch import fetch
+
+    FIXTURE_DIR.mkdir(parents=True, exist_ok=True)
+    listing = fetch(TARGET_URL, revalidate=False)
+    (FIXTURE_DIR / "listing.html").write_bytes(listing.content)
+    print(f"💾 listing.html ({len(listing.content) // 1024} KB)")
+
+    rows = [parse_listing_row(row) for row in parse_listing_rows(listing.content)[1:]]
+    for i, row in enumerate([r for r in rows if r][:notice_pages]):
+        page = fetch(row["page_url"], revalidate=False)
+        (FIXTURE_DIR / f"notice_{i:02d}.html").write_bytes(page.content)
+        print(f"💾 notice_{i:02d}.html ({len(page.content) // 1024} KB)")
+
+
+def synthetic_listing(rows: int) -> bytes:
+    head = "<html><head><title>Notices</title></head><body>" + "<div class='nav'><a href='/'>Home</a></div>" * 50
+    body = "".join(
+        f"<tr><td>{i}</td><td>Notice number {i} regarding examinations</td><td>CSE</td>"
+        f"<td>{(i % 28) + 1:02d}-01-2026</td><td><a href='/pages-notice-{i}'>View</a></td></tr>"
+        for i in range(rows)
+    )
+    return f"{head}<table><tr><th>#</th><th>Title</th><th>Dept</th><th>Date</th><th></th></tr>{body}</table></body></html>".encode()
+
+
+def time_call(fn, repeat: int) -> float:
+    """Median wall time in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def bench_page(label: str, markup: bytes, kind: str, parsers, repeat: int):
+    from bs4 import BeautifulSoup
+
+    tag = "tr" if kind == "listing" else "a"
+    strained = parse_listing_rows if kind == "listing" else parse_links
+
+    def baseline():
+        soup = BeautifulSoup(markup, "html.parser")
+        return soup.find_all(tag, href=True) if tag == "a" else soup.find_all(tag)
+
+    base_ms = time_call(baseline, repeat)
+    expected = len(baseline())
+    print(f"\n{label} ({len(markup) // 1024} KB, {expected} <{tag}>)")
+    print(f"   full tree, html.parser : {base_ms:8.2f} ms")
+    for parser in parsers:
+        found = len(strained(markup, parser=parser))
+        ms = time_call(lambda: strained(markup, parser=parser), repeat)
+        check = "" if found == expected else f"  ⚠️ found {found} <{tag}>"
+        print(f"   strained, {parser:<12} : {ms:8.2f} ms  ({base_ms / ms:4.1f}x){check}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark listing/notice page parsing")
+    parser.add_argument("--record", action="store_true", help="download fresh fixture pages first")
+    parser.add_argument("--notice-pages", type=int, default=5, help="notice pages to record")
+    parser.add_argument("--synthetic", type=int, default=0, help="also bench a generated listing of N rows")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixtures(args.notice_pages)
+
+    parsers = ["html.parser"] + [p for p in ("lxml",) if importlib.util.find_spec(p)]
+
+    pages = []
+    if (FIXTURE_DIR / "listing.html").exists():
+        pages.append(("listing.html", (FIXTURE_DIR / "listing.html").read_bytes(), "listing"))
+    pages += [(p.name, p.read_bytes(), "notice") for p in sorted(FIXTURE_DIR.glob("notice_*.html"))]
+    if args.synthetic:
+        pages.append((f"synthetic listing x{args.synthetic}", synthetic_listing(args.synthetic), "listing"))
+
+    if not pages:
+        print(f"❌ No fixtures in {FIXTURE_DIR}. Run with --record, or pass --synthetic N.")
+        return
+
+    for label, markup, kind in pages:
+        bench_page(label, markup, kind, parsers, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
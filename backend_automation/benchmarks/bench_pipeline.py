@@ -0,0 +1,477 @@
+"""
+Offline Replay Benchmark for the Scraping Pipeline
+Replays recorded listing pages, notice pages and attachments through
+run_live_scraper and CITKDataProcessor.batch_process_notices, with fake
+Gemini / Firestore / FCM stand-ins of configurable latency, and reports
+per-stage p50/p95, notices per second and peak RSS
+
+Generate a synthetic fixture set and run it:
+    python backend_automation/benchmarks/bench_pipeline.py --synthetic 40
+Record real pages once (needs network), then replay them offline:
+    python backend_automation/benchmarks/bench_pipeline.py --record fixtures/live
+    python backend_automation/benchmarks/bench_pipeline.py --fixtures fixtures/live
+Add --json results.json to keep numbers for run-over-run comparison.
+"""
+
+import argparse
+import io
+import json
+import os
+import re
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import types
+from collections import defaultdict
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+MANIFEST = "manifest.json"
+
+
+# ==========================================
+# 📼 HTTP REPLAY
+# ==========================================
+def make_replay_adapter(fixture_dir: Path, latency: float):
+    """requests transport adapter that answers from a fixture manifest"""
+    import requests
+    from requests.adapters import BaseAdapter
+    from requests.structures import CaseInsensitiveDict
+    from requests.utils import get_encoding_from_headers
+
+    manifest = json.loads((fixture_dir / MANIFEST).read_text())
+
+    class ReplayAdapter(BaseAdapter):
+        def send(self, request, **kwargs):
+            time.sleep(latency)
+            entry = manifest.get(request.url)
+            response = requests.Response()
+            response.url = request.url
+            response.request = request
+            if entry is None:
+                response.status_code = 404
+                response.reason = "Not Found"
+                response.raw = io.BytesIO(b"")
+                return response
+            response.status_code = 200
+            response.reason = "OK"
+            response.headers = CaseInsensitiveDict({"Content-Type": entry["content_type"]})
+            response.encoding = get_encoding_from_headers(response.headers)
+            response.raw = io.BytesIO((fixture_dir / entry["path"]).read_bytes())
+            return response
+
+        def close(self):
+            pass
+
+    return ReplayAdapter()
+
+
+def make_recording_adapter(fixture_dir: Path):
+    """Real HTTP adapter that also writes every 200 response into the fixture set"""
+    from requests.adapters import HTTPAdapter
+
+    manifest_path = fixture_dir / MANIFEST
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    lock = threading.Lock()
+
+    class RecordingAdapter(HTTPAdapter):
+        def send(self, request, **kwargs):
+            kwargs["stream"] = False
+            response = super().send(request, **kwargs)
+            if response.status_code == 200:
+                name = re.sub(r"[^A-Za-z0-9._-]", "_", urlparse(request.url).path.strip("/")) or "index"
+                with lock:
+                    path = f"{len(manifest):04d}_{name}"
+                    (fixture_dir / path).write_bytes(response.content)
+                    manifest[request.url] = {
+                        "path": path,
+                        "content_type": response.headers.get("Content-Type", "application/octet-stream"),
+                    }
+                    manifest_path.write_text(json.dumps(manifest, indent=2))
+            return response
+
+    return RecordingAdapter()
+
+
+def write_synthetic_fixtures(fixture_dir: Path, count: int):
+    """Listing with `count` rows, one notice page and one small PDF per row"""
+    from PyPDF2 import PdfWriter
+
+    manifest = {}
+
+    def add(url, path, content_type, body: bytes):
+        (fixture_dir / path).write_bytes(body)
+        manifest[url] = {"path": path, "content_type": content_type}
+
+    rows = []
+    for i in range(count):
+        page_path = f"/pages-notice-{i}"
+        rows.append(
+            f"<tr><td>{i + 1}</td><td>Synthetic notice {i} on examinations and scholarships</td>"
+            f"<td>CSE</td><td>{(i % 28) + 1:02d}-01-2026</td><td><a href='{page_path}'>View</a></td></tr>"
+        )
+        pdf_url = f"https://cit.ac.in/uploads/notices/files/{1767000000 + i}.pdf"
+        add(f"https://cit.ac.in{page_path}", f"notice_{i:04d}.html", "text/html; charset=utf-8",
+            f"<html><body><img src='/logo.png'><div class='content'><p>Notice {i}</p>"
+            f"<a href='{pdf_url}'>Download</a></div></body></html>".encode())
+
+        writer = PdfWriter()
+        writer.add_blank_page(width=200 + i, height=200)  # distinct bytes per notice
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        add(pdf_url, f"file_{i:04d}.pdf", "application/pdf", buffer.getvalue())
+
+    listing = ("<html><body><table><tr><th>#</th><th>Title</th><th>Dept</th><th>Date</th><th></th></tr>"
+               + "".join(rows) + "</table></body></html>")
+    add("https://cit.ac.in/pages-notices-all", "listing.html", "text/html; charset=utf-8", listing.encode())
+    (fixture_dir / MANIFEST).write_text(json.dumps(manifest, indent=2))
+
+
+# ==========================================
+# 🎭 FAKE GEMINI / FIRESTORE / FCM
+# ==========================================
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """Stands in for GenerativeModel; answers batch prompts with one entry per notice id"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def generate_content(self, contents):
+        time.sleep(self.latency)
+        prompt = contents if isinstance(contents, str) else str(contents[-1])
+        analysis = {
+            "is_important": True,
+            "category": "Exam",
+            "target_audience": ["All Students"],
+            "summary": "Replay benchmark analysis",
+            "entities": {},
+            "keywords": ["benchmark"],
+        }
+        ids = re.findall(r"### Notice id: (\w+)", prompt)
+        if ids:
+            return FakeResponse(json.dumps([dict(analysis, id=i) for i in ids]))
+        return FakeResponse(json.dumps(analysis))
+
+
+class FakeDoc:
+    def __init__(self, doc_id: str, data: Dict):
+        self.id = doc_id
+        self._data = data
+        self.exists = True
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class FakeQuery:
+    def __init__(self, db, name: str, filters=(), limit_to=None):
+        self.db = db
+        self.name = name
+        self.filters = list(filters)
+        self.limit_to = limit_to
+
+    def where(self, field, op, value):
+        return FakeQuery(self.db, self.name, self.filters + [(field, value)], self.limit_to)
+
+    def limit(self, count):
+        return FakeQuery(self.db, self.name, self.filters, count)
+
+    def select(self, fields):
+        return self
+
+    def stream(self):
+        time.sleep(self.db.latency)
+        matches = []
+        for doc_id, data in list(self.db.collections[self.name].items()):
+            if all(_lookup(data, field) == value for field, value in self.filters):
+                matches.append(FakeDoc(doc_id, data))
+                if self.limit_to and len(matches) >= self.limit_to:
+                    break
+        return iter(matches)
+
+    def get(self):
+        return list(self.stream())
+
+
+def _lookup(data: Dict, dotted: str):
+    for part in dotted.split("."):
+        data = data.get(part) if isinstance(data, dict) else None
+    return data
+
+
+class FakeDocRef:
+    def __init__(self, db, name: str, doc_id: str):
+        self.db = db
+        self.name = name
+        self.id = doc_id
+
+    def set(self, data, merge=False):
+        time.sleep(self.db.latency)
+        with self.db.lock:
+            current = self.db.collections[self.name].get(self.id, {}) if merge else {}
+            self.db.collections[self.name][self.id] = {**current, **data}
+
+    def get(self):
+        data = self.db.collections[self.name].get(self.id)
+        doc = FakeDoc(self.id, data or {})
+        doc.exists = data is not None
+        return doc
+
+
+class FakeCollection(FakeQuery):
+    def document(self, doc_id):
+        return FakeDocRef(self.db, self.name, doc_id)
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self.db = db
+        self.writes = []
+
+    def set(self, ref, data, merge=False):
+        self.writes.append((ref, data, merge))
+
+    def commit(self):
+        time.sleep(self.db.latency)
+        with self.db.lock:
+            for ref, data, merge in self.writes:
+                current = self.db.collections[ref.name].get(ref.id, {}) if merge else {}
+                self.db.collections[ref.name][ref.id] = {**current, **data}
+        self.writes = []
+
+
+class FakeFirestore:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.collections = defaultdict(dict)
+        self.lock = threading.Lock()
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def get_all(self, refs):
+        time.sleep(self.latency)
+        return [ref.get() for ref in refs]
+
+
+def install_fake_firebase(db: FakeFirestore, push_latency: float):
+    """Register firebase_admin stand-ins so no credentials or network are touched"""
+    firebase_admin = types.ModuleType("firebase_admin")
+    firebase_admin._apps = {"[DEFAULT]": object()}  # type: ignore
+    firebase_admin.initialize_app = lambda *a, **k: None  # type: ignore
+
+    credentials = types.ModuleType("firebase_admin.credentials")
+    credentials.Certificate = lambda *a, **k: None  # type: ignore
+
+    firestore = types.ModuleType("firebase_admin.firestore")
+    firestore.SERVER_TIMESTAMP = "SERVER_TIMESTAMP"  # type: ignore
+    firestore.client = lambda *a, **k: db  # type: ignore
+
+    messaging = types.ModuleType("firebase_admin.messaging")
+
+    class _Record:
+        def __init__(self, **kwargs):
+            self.__dict__.update(kwargs)
+
+    def send(message):
+        time.sleep(push_latency)
+        return "fake-message-id"
+
+    def send_each(messages):
+        time.sleep(push_latency)
+        return _Record(success_count=len(messages), failure_count=0,
+                       responses=[_Record(success=True, exception=None) for _ in messages])
+
+    messaging.Message = _Record  # type: ignore
+    messaging.Notification = _Record  # type: ignore
+    messaging.send = send  # type: ignore
+    messaging.send_each = send_each  # type: ignore
+
+    for name, module in (("credentials", credentials), ("firestore", firestore), ("messaging", messaging)):
+        setattr(firebase_admin, name, module)
+        sys.modules[f"firebase_admin.{name}"] = module
+    sys.modules["firebase_admin"] = firebase_admin
+
+
+# ==========================================
+# ⏱️ STAGE TIMING
+# ==========================================
+class StageRecorder:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def wrap(self, owner, attr: str, stage: str, when: Optional[Callable[..., bool]] = None):
+        """Time calls to owner.attr as `stage`; with `when`, only the calls it accepts"""
+        original = getattr(owner, attr)
+
+        @wraps(original)
+        def timed(*args, **kwargs):
+            if when is not None and not when(*args, **kwargs):
+                return original(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                with self.lock:
+                    self.samples[stage].append(time.perf_counter() - started)
+
+        setattr(owner, attr, timed)
+
+    def summary(self) -> Dict[str, Dict]:
+        result = {}
+        for stage, samples in self.samples.items():
+            ordered = sorted(samples)
+            result[stage] = {
+                "count": len(ordered),
+                "p50_ms": statistics.median(ordered) * 1000,
+                "p95_ms": ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))] * 1000,
+                "total_s": sum(ordered),
+            }
+        return result
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+# ==========================================
+# 🚀 SCENARIOS
+# ==========================================
+def bench_live_scraper(recorder: StageRecorder, gemini_latency: float, concurrency: int) -> Dict:
+    import citk_scraper
+    from http_fetch import Fetcher
+
+    citk_scraper.gemini._model = FakeGeminiModel(gemini_latency)
+    # fetch() also loads notice pages inside find_best_attachment_link; those count as detail_page
+    recorder.wrap(citk_scraper, "fetch", "listing_fetch",
+                  when=lambda url, *args, **kwargs: url == citk_scraper.TARGET_URL)
+    recorder.wrap(citk_scraper, "find_best_attachment_link", "detail_page")
+    recorder.wrap(Fetcher, "download", "attachment_download")
+    recorder.wrap(citk_scraper, "triage_notice", "dedup_check")
+    recorder.wrap(citk_scraper, "generate_analysis", "gemini_generate")
+    recorder.wrap(citk_scraper, "save_notice", "firestore_write_and_push")
+    recorder.wrap(citk_scraper, "send_push_notification", "push_enqueue")
+
+    started = time.perf_counter()
+    saved = citk_scraper.run_live_scraper(concurrency=concurrency, backfill=True)
+    wall = time.perf_counter() - started
+    return {"notices": saved, "wall_s": wall, "notices_per_s": saved / wall if wall else 0.0}
+
+
+def bench_batch_processor(fixture_dir: Path, recorder: StageRecorder, gemini_latency: float,
+                          workers: int, batch_size: int) -> Dict:
+    from ai_data_processor import CITKDataProcessor
+    from rate_limiter import GeminiRateLimiter
+
+    manifest = json.loads((fixture_dir / MANIFEST).read_text())
+    notices = []
+    for i, url in enumerate(u for u, e in manifest.items() if e["content_type"].startswith("application/pdf")):
+        notice = {"title": f"Replay notice {i}", "date": "01-01-2026", "url": url}
+        if i % 2:
+            notice["text"] = f"Replay notice {i} text about examinations, fees and hostel allotment. " * 5
+        notices.append(notice)
+
+    processor = CITKDataProcessor("offline", rate_limiter=GeminiRateLimiter(rpm=1e9, tpm=1e12))
+    processor.gemini._model = FakeGeminiModel(gemini_latency)
+    recorder.wrap(processor, "_download_and_extract_pdf", "pdf_download_extract")
+    recorder.wrap(processor, "analyze_notice_with_ai", "gemini_single")
+    recorder.wrap(processor, "_analyze_batch", "gemini_batch")
+
+    started = time.perf_counter()
+    processed = processor.batch_process_notices(notices, workers=workers, batch_size=batch_size)
+    wall = time.perf_counter() - started
+    return {"notices": len(processed), "wall_s": wall, "notices_per_s": len(processed) / wall if wall else 0.0}
+
+
+def print_report(name: str, totals: Dict, stages: Dict):
+    print(f"\n📊 {name}: {totals['notices']} notices in {totals['wall_s']:.2f}s "
+          f"({totals['notices_per_s']:.2f} notices/s)")
+    print(f"   {'stage':<28}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'total s':>10}")
+    for stage, s in stages.items():
+        print(f"   {stage:<28}{s['count']:>7}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['total_s']:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline replay benchmark for the scraping pipeline")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--fixtures", type=Path, help="directory with manifest.json and recorded bodies")
+    source.add_argument("--synthetic", type=int, default=20, help="generate N synthetic notices (default)")
+    source.add_argument("--record", type=Path, help="run the live scraper against cit.ac.in and record into DIR")
+    parser.add_argument("--http-latency", type=float, default=0.02, help="seconds per replayed request")
+    parser.add_argument("--gemini-latency", type=float, default=0.5)
+    parser.add_argument("--firestore-latency", type=float, default=0.05)
+    parser.add_argument("--push-latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=4, help="live scraper workers")
+    parser.add_argument("--workers", type=int, default=4, help="batch processor workers")
+    parser.add_argument("--batch-size", type=int, default=8, help="batch processor prompt batch size")
+    parser.add_argument("--scenario", choices=["all", "scraper", "processor"], default="all")
+    parser.add_argument("--json", type=Path, help="write results to this file")
+    args = parser.parse_args()
+
+    # Every run starts from empty local caches, isolated from real ones
+    os.environ["CITK_CACHE_DIR"] = tempfile.mkdtemp(prefix="citk_bench_cache_")
+
+    db = FakeFirestore(args.firestore_latency)
+    install_fake_firebase(db, args.push_latency)
+
+    from http_fetch import get_fetcher
+
+    if args.record:
+        args.record.mkdir(parents=True, exist_ok=True)
+        get_fetcher().session.mount("https://", make_recording_adapter(args.record))
+        import citk_scraper
+        citk_scraper.gemini._model = FakeGeminiModel(0)
+        citk_scraper.run_live_scraper(backfill=True)
+        print(f"💾 Recorded fixtures into {args.record}")
+        return
+
+    fixture_dir = args.fixtures
+    if fixture_dir is None:
+        fixture_dir = Path(tempfile.mkdtemp(prefix="citk_bench_fixtures_"))
+        write_synthetic_fixtures(fixture_dir, args.synthetic)
+    adapter = make_replay_adapter(fixture_dir, args.http_latency)
+    get_fetcher().session.mount("https://", adapter)
+    get_fetcher().session.mount("http://", adapter)
+
+    results = {"config": {k: str(v) for k, v in vars(args).items()}}
+    if args.scenario in ("all", "scraper"):
+        recorder = StageRecorder()
+        totals = bench_live_scraper(recorder, args.gemini_latency, args.concurrency)
+        results["live_scraper"] = {**totals, "stages": recorder.summary()}
+    if args.scenario in ("all", "processor"):
+        recorder = StageRecorder()
+        totals = bench_batch_processor(fixture_dir, recorder, args.gemini_latency, args.workers, args.batch_size)
+        results["batch_processor"] = {**totals, "stages": recorder.summary()}
+    results["peak_rss_mb"] = peak_rss_mb()
+
+    for name in ("live_scraper", "batch_processor"):
+        if name in results:
+            print_report(name, results[name], results[name]["stages"])
+    print(f"\n🧮 Peak RSS: {results['peak_rss_mb']:.1f} MB")
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+        print(f"💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Notice Search Benchmark
+Builds notice_search indexes over synthetic notice sets (10k and 100k by
+default), memory-maps them back and times a mix of queries
+
+    python backend_automation/benchmarks/bench_search.py
+    python backend_automation/benchmarks/bench_search.py --sizes 1000 10000 --queries 500
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from notice_search import SearchIndex, write_index  # noqa: E402
+
+CATEGORIES = ["Academic", "Scholarship", "Event", "Exam", "Admission", "Recruitment", "Holiday", "General"]
+TOPIC_WORDS = ("examination semester schedule scholarship hostel allotment fee payment recruitment faculty "
+               "internship workshop seminar holiday admission registration result revaluation library "
+               "sports convocation tender project department electronics mechanical civil computer").split()
+
+
+def synthetic_notices(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    # Zipf-ish filler vocabulary so posting lengths look like real text
+    filler = [f"w{i}" for i in range(20000)]
+    weights = [1 / (i + 1) for i in range(len(filler))]
+    for i in range(count):
+        topic = rng.sample(TOPIC_WORDS, 3)
+        body = rng.choices(filler, weights, k=60) + rng.choices(TOPIC_WORDS, k=6)
+        yield {
+            "id": f"notice{i:06d}",
+            "meta": {
+                "title": f"Notice on {' '.join(topic)} {i}",
+                "date": f"{rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-{rng.choice([2024, 2025, 2026])}",
+            },
+            "content": " ".join(body),
+            "ai_analysis": {
+                "category": rng.choice(CATEGORIES),
+                "summary": f"Students should note the {topic[0]} and {topic[1]} details.",
+                "keywords": topic,
+            },
+        }
+
+
+def query_mix(rng: random.Random):
+    word = rng.choice(TOPIC_WORDS)
+    return rng.choice([
+        ("rare term", lambda index: index.search(f"w{rng.randint(5000, 19999)}", prefix=False)),
+        ("common term", lambda index: index.search(word, prefix=False)),
+        ("two terms", lambda index: index.search(f"{word} {rng.choice(TOPIC_WORDS)}", prefix=False)),
+        ("prefix", lambda index: index.search(word[:4])),
+        ("filtered", lambda index: index.search(word, category=rng.choice(CATEGORIES),
+                                                since="01-01-2025", until="31-12-2025", prefix=False)),
+    ])
+
+
+def bench(size: int, queries: int, directory: Path):
+    started = time.perf_counter()
+    path = write_index(synthetic_notices(size), directory / f"bench_{size}.idx")
+    build_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    index = SearchIndex.open(path)
+    open_ms = (time.perf_counter() - started) * 1000
+
+    rng = random.Random(size)
+    samples = {}
+    for _ in range(queries):
+        name, run = query_mix(rng)
+        started = time.perf_counter()
+        run(index)
+        samples.setdefault(name, []).append((time.perf_counter() - started) * 1_000_000)
+
+    print(f"\n📚 {size:,} notices: built in {build_s:.1f}s, {path.stat().st_size / 1024 / 1024:.1f} MB, "
+          f"opened in {open_ms:.2f} ms")
+    print(f"   {'query':<14}{'n':>6}{'p50 µs':>10}{'p95 µs':>10}")
+    for name, values in sorted(samples.items()):
+        values.sort()
+        p95 = values[min(len(values) - 1, int(0.95 * len(values)))]
+        print(f"   {name:<14}{len(values):>6}{statistics.median(values):>10.0f}{p95:>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the local notice search index")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="citk_bench_search_") as tmp:
+        for size in args.sizes:
+            bench(size, args.queries, Path(tmp))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Import-Time Budget Check
+Imports a module in a fresh interpreter under `python -X importtime` and
+fails if any of the heavy, lazily-loaded dependencies (bs4, firebase_admin,
+google.generativeai) were pulled in, or if the import took too long
+
+    python backend_automation/benchmarks/check_import_time.py
+    python backend_automation/benchmarks/check_import_time.py --module ai_data_processor --budget-ms 300
+Exits with status 1 when the budget is broken, so CI can run it as-is.
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Only needed once a notice is actually parsed, uploaded or analyzed
+FORBIDDEN = ("bs4", "firebase_admin", "google.generativeai")
+
+
+def import_times(module: str) -> List[Tuple[str, int, int]]:
+    """(name, self µs, cumulative µs) for every module the import loaded, in load order"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(own), int(cumulative)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check what a backend module loads at import time")
+    parser.add_argument("--module", default="citk_scraper")
+    parser.add_argument("--budget-ms", type=float, default=None, help="also fail above this cumulative time")
+    args = parser.parse_args()
+
+    rows = import_times(args.module)
+    total_us = next((cumulative for name, _, cumulative in rows if name == args.module), 0)
+    print(f"⏱️  import {args.module}: {total_us / 1000:.1f} ms, {len(rows)} modules")
+    for name, _, cumulative in sorted(rows, key=lambda row: -row[2])[:10]:
+        print(f"   {cumulative / 1000:>8.1f} ms  {name}")
+
+    loaded = {name for name, _, _ in rows}
+    heavy = [dep for dep in FORBIDDEN
+             if any(name == dep or name.startswith(dep + ".") for name in loaded)]
+    failed = False
+    if heavy:
+        print(f"❌ {args.module} imports {', '.join(heavy)} eagerly")
+        failed = True
+    if args.budget_ms is not None and total_us / 1000 > args.budget_ms:
+        print(f"❌ Over budget: {total_us / 1000:.1f} ms > {args.budget_ms:.1f} ms")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("✅ Import budget OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,71 +1,190 @@
 import os
 import time
 import json
-import requests
 import hashlib
 import mimetypes
 import base64
-from bs4 import BeautifulSoup
-import firebase_admin
-from firebase_admin import credentials, firestore, messaging
-import google.generativeai as genai
+import threading
+import asyncio
+import signal
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from urllib.parse import urlparse
+from http_fetch import fetch, get_fetcher
+from crawl_cursor import CrawlCursor
+from dedup_index import DedupIndex
+from analysis_cache import get_analysis_cache
+from gemini_client import GeminiClient
+from html_parsing import parse_links, parse_listing_rows
+from metrics import get_metrics
+from notifications import get_dispatcher
+from near_dup import get_near_dup_index, minhash_signature, similarity
 
 # ==========================================
 # ⚙️ CONFIGURATION
 # ==========================================
 TARGET_URL = "https://cit.ac.in/pages-notices-all"
-temp_filename = "temp_live_doc"
-
-# Initialize Firebase
-if not firebase_admin._apps:
-    # Decode the Secret Key from GitHub Environment
-    firebase_key_b64 = os.environ.get('FIREBASE_JSON_BASE64')
-    if firebase_key_b64:
-        decoded_key = base64.b64decode(firebase_key_b64)
-        cred_dict = json.loads(decoded_key)
-        cred = credentials.Certificate(cred_dict)
-        firebase_admin.initialize_app(cred)
-    else:
-        print("⚠️ Local Mode: Using service-account.json")
-        cred = credentials.Certificate("backend_automation/service-account.json")
-        firebase_admin.initialize_app(cred)
 
-db = firestore.client()
+GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-1.5-flash")
+# Files up to this size are sent inline with the prompt; bigger ones go
+# through the File API (upload, wait until ACTIVE, delete)
+GEMINI_INLINE_MAX_BYTES = int(os.environ.get("GEMINI_INLINE_MAX_BYTES", str(8 * 1024 * 1024)))
+GEMINI_UPLOAD_TIMEOUT = 60
+# Cached analyses are keyed on a hash of this text - editing it re-analyzes
+GEMINI_PROMPT = """
+        Analyze this college notice. Extract strictly valid JSON:
+        {
+            "is_important": boolean,
+            "category": "Exam/Academic/Scholarship/Hostel/General",
+            "target_audience": ["CSE", "Civil", "All", "Faculty", etc],
+            "summary": "15-word summary",
+            "entities": {
+                "event_date": "YYYY-MM-DD",
+                "semester": "String"
+            }
+        }
+        """
+
+# Packed export of live_notices (notice_archive.py pack ...). While it is
+# newer than the dedup index's max age it warms the index instead of a full
+# Firestore scan; hashes it lacks are still confirmed against Firestore
+DEDUP_ARCHIVE = os.environ.get(
+    "CITK_DEDUP_ARCHIVE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "citk_master_database.citkarc"))
+
+# Near-duplicate check reads at most this much text from a new attachment
+NEAR_DUP_CHAR_BUDGET = int(os.environ.get("NEAR_DUP_CHAR_BUDGET", "20000"))
+
+# Crawl concurrency: total worker threads, and how many of them may talk to
+# the same host at once (so a backfill doesn't hammer cit.ac.in)
+MAX_WORKERS = int(os.environ.get("SCRAPER_CONCURRENCY", "4"))
+PER_HOST_LIMIT = int(os.environ.get("SCRAPER_PER_HOST_LIMIT", "2"))
 
-# Initialize Gemini
-genai.configure(api_key=os.environ.get("GEMINI_API_KEY")) # type: ignore
+# With no crawl cursor yet (first run / wiped cache) only look at this many rows
+BOOTSTRAP_ROWS = int(os.environ.get("SCRAPER_BOOTSTRAP_ROWS", "5"))
+
+# --watch mode poll intervals in seconds (see next_poll_interval)
+POLL_AFTER_CHANGE = int(os.environ.get("SCRAPER_POLL_AFTER_CHANGE", "20"))
+POLL_OFFICE_HOURS = int(os.environ.get("SCRAPER_POLL_OFFICE_HOURS", "45"))
+POLL_OFF_HOURS = int(os.environ.get("SCRAPER_POLL_OFF_HOURS", "300"))
+POLL_OVERNIGHT = int(os.environ.get("SCRAPER_POLL_OVERNIGHT", "900"))
+RECENT_CHANGE_WINDOW = timedelta(minutes=30)
+CAMPUS_TZ = timezone(timedelta(hours=5, minutes=30))  # IST
+
+# Firebase, Gemini and bs4 (see html_parsing) are heavy to import and to set up, and a run
+# that finds nothing new needs none of them - so all three load on demand
+_db = None
+_db_lock = threading.Lock()
+
+def get_db():
+    """Firestore client, initializing Firebase on first use."""
+    global _db
+    with _db_lock:
+        if _db is None:
+            import firebase_admin
+            from firebase_admin import credentials, firestore
+
+            if not firebase_admin._apps:
+                # Decode the Secret Key from GitHub Environment
+                firebase_key_b64 = os.environ.get('FIREBASE_JSON_BASE64')
+                if firebase_key_b64:
+                    decoded_key = base64.b64decode(firebase_key_b64)
+                    cred_dict = json.loads(decoded_key)
+                    cred = credentials.Certificate(cred_dict)
+                    firebase_admin.initialize_app(cred)
+                else:
+                    print("⚠️ Local Mode: Using service-account.json")
+                    cred = credentials.Certificate("backend_automation/service-account.json")
+                    firebase_admin.initialize_app(cred)
+
+            _db = firestore.client()
+        return _db
+
+# Gemini is configured once, on the first analysis of the run
+gemini = GeminiClient(api_key=os.environ.get("GEMINI_API_KEY"), model_name=GEMINI_MODEL)
 
 # ==========================================
 # 🛠️ HELPER FUNCTIONS
 # ==========================================
 
+metrics = get_metrics()
+
+def stage(name):
+    """Times one live-scraper stage (no-op when CITK_METRICS=0)."""
+    return metrics.time(name, pipeline="live")
+
 def clean_url(base, path):
     path = str(path).strip()
     if path.startswith('http'): return path
     if not path.startswith('/'): path = '/' + path
     return base + path
 
-def get_file_hash(filepath):
-    hasher = hashlib.md5()
-    with open(filepath, 'rb') as f:
-        buf = f.read()
-        hasher.update(buf)
-    return hasher.hexdigest()
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+@contextmanager
+def host_slot(url):
+    """Limits how many requests run against one host at the same time."""
+    host = urlparse(url).netloc
+    with _host_slots_lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = threading.BoundedSemaphore(PER_HOST_LIMIT)
+            _host_slots[host] = slot
+    with slot:
+        yield
+
+_dedup_index = None
+
+def get_dedup_index():
+    """Local URL/hash index (see refresh_dedup_index)."""
+    global _dedup_index
+    if _dedup_index is None:
+        _dedup_index = DedupIndex()
+    return _dedup_index
+
+def refresh_dedup_index():
+    """Bulk-warms the dedup index from live_notices (or a fresh archive of it) when it is stale."""
+    index = get_dedup_index()
+    if index.needs_warmup():
+        if os.path.exists(DEDUP_ARCHIVE) and time.time() - os.path.getmtime(DEDUP_ARCHIVE) < index.max_age:
+            count = index.warm_from_archive(DEDUP_ARCHIVE)
+            print(f"📇 Dedup index warmed with {count} notices from {os.path.basename(DEDUP_ARCHIVE)}.")
+        else:
+            count = index.warm_from_firestore(get_db())
+            print(f"📇 Dedup index warmed with {count} notices.")
+    return index
 
 def check_if_exists(file_hash):
-    """Checks Firestore to see if we already processed this file hash."""
-    docs = db.collection('live_notices').where('file_hash', '==', file_hash).limit(1).get()
-    return len(docs) > 0
+    """Checks whether we already processed this file hash."""
+    index = get_dedup_index()
+    if index.has_hash(file_hash):
+        metrics.inc("dedup_local_hits", pipeline="live")
+        return True
+
+    # A local miss is confirmed against Firestore before paying for Gemini,
+    # in case another writer added the notice since the last warm-up
+    with stage("dedup_query"):
+        docs = get_db().collection('live_notices').where('file_hash', '==', file_hash).limit(1).get()
+    if docs:
+        index.record(None, file_hash, docs[0].id)
+        return True
+    return False
 
 def find_best_attachment_link(notice_page_url):
-    """Smart Selector logic from God Mode."""
+    """
+    Smart Selector logic from God Mode. Returns None when the page has no
+    attachment; raises when the page itself could not be loaded, so the row
+    is retried instead of being settled as attachment-less.
+    """
+    with host_slot(notice_page_url), stage("detail_page"):
+        response = fetch(notice_page_url, timeout=15)
+    if response.status_code != 200:
+        raise RuntimeError(f"Notice page returned HTTP {response.status_code}")
     try:
-        response = requests.get(notice_page_url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=15)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
         candidates = []
-        for a in soup.find_all('a', href=True):
+        for a in parse_links(response.content):
             href = str(a['href'])
             # Filter for likely documents
             if any(ext in href.lower() for ext in ['.pdf', '.jpg', '.jpeg', '.png', 'uploads/']):
@@ -81,148 +200,475 @@ def find_best_attachment_link(notice_page_url):
         pass
     return None
 
-def analyze_with_gemini(filepath):
-    """Uploads file to Gemini and gets structured JSON."""
-    print("      🧠 Waking up Gemini Vision...")
-    try:
-        mime_type, _ = mimetypes.guess_type(filepath)
-        if not mime_type: mime_type = "application/pdf"
+def analyze_downloads_with_gemini(downloads):
+    """
+    Gets structured JSON for each download, in order (None where it failed).
+    Cached results are reused; small files are sent inline in the request,
+    large ones are uploaded together and waited on concurrently.
+    """
+    cache = get_analysis_cache()
+    results = [None] * len(downloads)
+    uploads = []
 
-        # Explicitly ignore type check for dynamic library imports
-        sample_file = genai.upload_file(path=filepath, display_name="Live Notice", mime_type=mime_type) # type: ignore
-        
-        # Wait for processing
-        wait_count = 0
-        while sample_file.state.name == "PROCESSING":
-            time.sleep(1)
-            sample_file = genai.get_file(sample_file.name) # type: ignore
-            wait_count += 1
-            if wait_count > 60: return None
-
-        model = genai.GenerativeModel(model_name="gemini-1.5-flash") # type: ignore
-        
-        prompt = """
-        Analyze this college notice. Extract strictly valid JSON:
-        {
-            "is_important": boolean,
-            "category": "Exam/Academic/Scholarship/Hostel/General",
-            "target_audience": ["CSE", "Civil", "All", "Faculty", etc],
-            "summary": "15-word summary",
-            "entities": {
-                "event_date": "YYYY-MM-DD",
-                "semester": "String"
-            }
-        }
-        """
-        response = model.generate_content([sample_file, prompt])
-        genai.delete_file(sample_file.name) # type: ignore
-        
+    for i, download in enumerate(downloads):
+        cached = cache.get(download.file_hash, GEMINI_MODEL, GEMINI_PROMPT)
+        if cached is not None:
+            print("      ♻️ Using cached Gemini analysis.")
+            metrics.inc("analysis_cache_hits", pipeline="live")
+            results[i] = cached
+        elif download.size <= GEMINI_INLINE_MAX_BYTES:
+            print("      🧠 Waking up Gemini Vision...")
+            blob = {"mime_type": get_mime_type(download), "data": download.read()}
+            results[i] = generate_analysis(download, [blob, GEMINI_PROMPT])
+        else:
+            uploads.append(i)
+
+    if uploads:
+        analyses = analyze_uploaded([downloads[i] for i in uploads])
+        for i, result in zip(uploads, analyses):
+            results[i] = result
+    return results
+
+def get_mime_type(download):
+    mime_type, _ = mimetypes.guess_type(urlparse(download.url).path)
+    if not mime_type and download.content_type:
+        mime_type = download.content_type.split(';')[0].strip()
+    if not mime_type or mime_type == "application/octet-stream":
+        mime_type = "application/pdf"
+    return mime_type
+
+def generate_analysis(download, contents):
+    try:
+        with stage("gemini_generate"):
+            response = gemini.generate(contents)
         clean_json = response.text.replace('```json', '').replace('```', '').strip()
-        return json.loads(clean_json)
+        result = json.loads(clean_json)
+        get_analysis_cache().put(download.file_hash, GEMINI_MODEL, GEMINI_PROMPT, result)
+        return result
     except Exception as e:
         print(f"      ❌ AI Error: {e}")
         return None
 
-def send_push_notification(data):
-    """Sends a notification to the app users."""
+def analyze_uploaded(downloads):
+    """File API path for large attachments: upload all, wait for all, then generate."""
+    genai = gemini.genai
+    files = []
+    for download in downloads:
+        print(f"      ⬆️ Uploading {download.size // 1024} KB to Gemini...")
+        mime_type = get_mime_type(download)
+        try:
+            with stage("gemini_upload"), download.as_path(suffix=mimetypes.guess_extension(mime_type) or "") as path:
+                # Explicitly ignore type check for dynamic library imports
+                files.append(genai.upload_file(path=path, display_name="Live Notice", mime_type=mime_type)) # type: ignore
+        except Exception as e:
+            print(f"      ❌ AI Error: {e}")
+            files.append(None)
+
     try:
-        # Default topic is 'all', specific topics can be added later
-        topic = "all"
-        message = messaging.Message(
-            notification=messaging.Notification(
-                title=f"📢 {data['ai_analysis']['category']} Update",
-                body=data['ai_analysis']['summary'],
-            ),
-            data={
-                "click_action": "FLUTTER_NOTIFICATION_CLICK",
-                "notice_id": data['id']
-            },
-            topic=topic,
-        )
-        messaging.send(message)
-        print(f"      🚀 Notification sent to topic: {topic}")
-    except Exception as e:
-        print(f"      ⚠️ Push failed: {e}")
+        with stage("gemini_poll"):
+            ready = asyncio.run(wait_until_active(files))
+        return [
+            generate_analysis(download, [f, GEMINI_PROMPT]) if f else None
+            for download, f in zip(downloads, ready)
+        ]
+    finally:
+        for f in files:
+            if f is None: continue
+            try:
+                genai.delete_file(f.name) # type: ignore
+            except Exception:
+                pass
+
+async def wait_until_active(files):
+    """Polls every uploaded file at once until it leaves PROCESSING."""
+    return await asyncio.gather(*(wait_for_file(f) for f in files))
+
+async def wait_for_file(uploaded, timeout=GEMINI_UPLOAD_TIMEOUT):
+    if uploaded is None: return None
+    genai = gemini.genai
+    delay = 0.5
+    deadline = time.monotonic() + timeout
+    while uploaded.state.name == "PROCESSING":
+        if time.monotonic() + delay > deadline:
+            print(f"      ❌ AI Error: {uploaded.name} still processing after {timeout}s")
+            return None
+        await asyncio.sleep(delay)
+        uploaded = await asyncio.to_thread(genai.get_file, uploaded.name) # type: ignore
+        delay = min(delay * 2, 8.0)
+    return uploaded if uploaded.state.name == "ACTIVE" else None
+
+def send_push_notification(data):
+    """
+    Queues a notification for the app users. The dispatcher sends it from a
+    background thread to the notice's audience/category topics, folding a
+    burst of notices into one digest (see notifications.py).
+    """
+    get_dispatcher().submit(data)
 
 # ==========================================
 # 🚀 MAIN ROBOT LOGIC
 # ==========================================
-def run_live_scraper():
+def parse_listing_row(row):
+    """Pulls title, date and detail-page link out of one listing <tr>."""
+    cols = row.find_all('td')
+    if len(cols) < 3: return None
+
+    link_tag = row.find('a', href=True)
+    if not link_tag: return None
+
+    return {
+        "title": cols[1].get_text(strip=True),
+        "date": cols[3].get_text(strip=True) if len(cols) > 3 else "Unknown",
+        "page_url": clean_url("https://cit.ac.in", link_tag['href']),
+    }
+
+def fetch_notice(notice):
+    """
+    Network half of a row: resolves the attachment and streams it into a
+    private spooled buffer, hashing on the way. Safe to run on worker threads.
+    """
+    notice = dict(notice, file_url=None, download=None, error=None, known=False)
+
+    # 1. Find PDF
+    try:
+        real_file_url = find_best_attachment_link(notice["page_url"])
+    except Exception as e:
+        # Page did not load: retried on a later run, not settled as attachment-less
+        notice["error"] = e
+        return notice
+    if not real_file_url: return notice
+    notice["file_url"] = real_file_url
+
+    # Attachment URL already indexed - no need to download it again
+    if get_dedup_index().has_url(real_file_url):
+        notice["known"] = True
+        return notice
+
+    # 2. Download (hash is computed while streaming)
+    try:
+        # The file is hashed while it streams, so this covers hashing too
+        with host_slot(real_file_url), stage("download"):
+            notice["download"] = get_fetcher().download(real_file_url, timeout=20)
+    except Exception as e:
+        notice["error"] = e
+    return notice
+
+def triage_notice(notice):
+    """
+    Dedup half of a row. Returns True once the row needs no more work,
+    False if it should be retried on the next run, and None if it is new
+    and has to be analyzed.
+    """
+    title = notice["title"]
+    download = notice["download"]
+    print(f"\n🔍 Checking: {title[:40]}...")
+
+    if notice["error"]:
+        print(f"      ⚠️ Processing Error: {notice['error']}")
+        return False
+    # No attachment on the notice page - nothing to analyze
+    if not notice["file_url"]: return True
+    if notice["known"]:
+        print("      ✅ Already in database. Skipping.")
+        return True
+    if not download: return False
+
+    try:
+        # 3. Hash was computed during the download
+        file_hash = download.file_hash
+
+        # 4. Check Database (Deduplication)
+        if check_if_exists(file_hash):
+            print("      ✅ Already in database. Skipping.")
+            # Same file under a new URL: remember the URL too
+            index = get_dedup_index()
+            index.record(notice["file_url"], file_hash, index.doc_for_hash(file_hash))
+            return True
+    except Exception as e:
+        print(f"      ⚠️ Processing Error: {e}")
+        return False
+
+    print("      🆕 New Notice detected!")
+    return None
+
+def notice_doc_id(title):
+    return hashlib.md5(title.encode()).hexdigest()
+
+def save_notice(notice, ai_data, duplicate_of=None):
+    """
+    Save and notify half of a row. Returns True if the notice went live.
+    A near-duplicate is saved with `duplicate_of` (the original's doc id)
+    and the original's analysis, and does not send a push.
+    """
+    if not ai_data: return False
+    from firebase_admin import firestore
+
+    title = notice["title"]
+    file_hash = notice["download"].file_hash
+    try:
+        # 6. Save to Firestore
+        doc_id = notice_doc_id(title)
+        if duplicate_of == doc_id:
+            # Would overwrite the original with a link to itself
+            duplicate_of = None
+        record = {
+            "id": doc_id,
+            "file_hash": file_hash,
+            "meta": { "title": title, "date": notice["date"], "url": notice["file_url"] },
+            "ai_analysis": ai_data,
+            "timestamp": firestore.SERVER_TIMESTAMP # type: ignore
+        }
+        if duplicate_of:
+            record["duplicate_of"] = duplicate_of
+
+        with stage("firestore_write"):
+            get_db().collection('live_notices').document(doc_id).set(record)
+        get_dedup_index().record(notice["file_url"], file_hash, doc_id)
+        if duplicate_of:
+            print(f"\n🪞 Saved as near-duplicate of {duplicate_of}: {title[:40]}...")
+            return True
+        get_near_dup_index("live_notices").add(doc_id, notice.get("signature"), ai_data)
+        print(f"\n💾 Saved to Firestore: {title[:40]}...")
+
+        # 7. Notify Users
+        send_push_notification(record)
+        return True
+    except Exception as e:
+        print(f"      ⚠️ Processing Error: {e}")
+        return False
+
+def run_live_scraper(max_rows=None, concurrency=None, backfill=False):
+    """
+    Walks the listing from the top until it reaches rows the crawl cursor has
+    already seen, and processes only the new ones (at most `max_rows`, if set).
+    `backfill` ignores the cursor and checks every row.
+    Detail pages and attachments are fetched by up to `concurrency` workers,
+    new attachments are analyzed together, and notices are saved in listing
+    order. Returns how many new notices were saved. Stage timings and
+    counters are written to METRICS_DIR when the run ends.
+    """
+    # The JSON summary covers this run only (--watch calls this repeatedly)
+    metrics.start_run()
+    try:
+        with stage("run"):
+            return _run_live_scraper(max_rows, concurrency, backfill)
+    finally:
+        # Pushes go out in the background; wait for them before the run ends
+        with stage("push_flush"):
+            get_dispatcher().flush()
+        metrics.flush("live_scraper")
+
+def attachment_signature(download):
+    """MinHash of a PDF attachment's text (None for images, scans and short notices)."""
+    if get_mime_type(download) != "application/pdf": return None
+    from pdf_extract import extract_pdf_text
+    try:
+        return minhash_signature(extract_pdf_text(download.file, char_budget=NEAR_DUP_CHAR_BUDGET).text)
+    except Exception as e:
+        print(f"      ⚠️ Text extraction failed, skipping near-duplicate check: {e}")
+        return None
+
+def split_near_duplicates(notices):
+    """
+    Separates new notices whose text nearly matches a saved notice, or an
+    earlier notice in this batch. Returns (originals, duplicates); every
+    duplicate carries "near_dup" - the NearDuplicate match or the earlier notice.
+    """
+    index = get_near_dup_index("live_notices")
+    originals, duplicates = [], []
+    for notice in notices:
+        with stage("near_dup"):
+            signature = notice["signature"] = attachment_signature(notice["download"])
+            # Same title means same doc id: that is an update of the notice, not a copy
+            doc_id = notice_doc_id(notice["title"])
+            match = index.find(signature, exclude=doc_id)
+            if match is None and signature is not None:
+                match = next((o for o in originals if o["signature"] is not None
+                              and notice_doc_id(o["title"]) != doc_id
+                              and similarity(o["signature"], signature) >= index.threshold), None)
+        if match is None:
+            originals.append(notice)
+        else:
+            notice["near_dup"] = match
+            duplicates.append(notice)
+    return originals, duplicates
+
+def _run_live_scraper(max_rows, concurrency, backfill):
     print("🕵️ Starting CITK Live Scraper (God Mode Edition)...")
+    cursor = CrawlCursor()
     
     try:
-        response = requests.get(TARGET_URL, headers={'User-Agent': 'Mozilla/5.0'}, timeout=20)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        rows = soup.find_all('tr')
+        with stage("listing_fetch"):
+            response = fetch(TARGET_URL, timeout=20)
+        if response.not_modified and not cursor.is_empty and not backfill:
+            if not cursor.pending:
+                print("✅ Listing unchanged since last run.")
+                return 0
+            print(f"✅ Listing unchanged; retrying {len(cursor.pending)} failed notices.")
+            rows = []
+        else:
+            rows = parse_listing_rows(response.content)
     except Exception as e:
         print(f"❌ Connection Error: {e}")
-        return
-
-    # Check only top 5 notices to keep it fast
-    for row in rows[1:6]:
-        cols = row.find_all('td')
-        if len(cols) < 3: continue
-            
-        title = cols[1].get_text(strip=True)
-        pub_date = cols[3].get_text(strip=True) if len(cols) > 3 else "Unknown"
-        
-        link_tag = row.find('a', href=True)
-        if not link_tag: continue
-        
-        web_page_link = clean_url("https://cit.ac.in", link_tag['href'])
-        
-        print(f"\n🔍 Checking: {title[:40]}...")
+        return 0
 
-        # 1. Find PDF
-        real_file_url = find_best_attachment_link(web_page_link)
-        
-        if real_file_url:
-            # 2. Download to Temp
-            try:
-                # Get extension
-                parsed = urlparse(real_file_url)
-                ext = os.path.splitext(parsed.path)[1]
-                if not ext: ext = ".pdf"
-                local_path = temp_filename + ext
-
-                r = requests.get(real_file_url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=20)
-                if r.status_code == 200:
-                    with open(local_path, 'wb') as f:
-                        f.write(r.content)
-                    
-                    # 3. Calculate Hash
-                    file_hash = get_file_hash(local_path)
-                    
-                    # 4. Check Database (Deduplication)
-                    if check_if_exists(file_hash):
-                        print("      ✅ Already in database. Skipping.")
-                    else:
-                        print("      🆕 New Notice detected! Analyzing...")
-                        
-                        # 5. Gemini Analysis
-                        ai_data = analyze_with_gemini(local_path)
-                        
-                        if ai_data:
-                            # 6. Save to Firestore
-                            doc_id = hashlib.md5(title.encode()).hexdigest()
-                            record = {
-                                "id": doc_id,
-                                "file_hash": file_hash,
-                                "meta": { "title": title, "date": pub_date, "url": real_file_url },
-                                "ai_analysis": ai_data,
-                                "timestamp": firestore.SERVER_TIMESTAMP # type: ignore
-                            }
-                            
-                            db.collection('live_notices').document(doc_id).set(record)
-                            print("      💾 Saved to Firestore.")
-                            
-                            # 7. Notify Users
-                            send_push_notification(record)
-                        
-                    # Cleanup
-                    if os.path.exists(local_path): os.remove(local_path)
-            except Exception as e:
-                print(f"      ⚠️ Processing Error: {e}")
+    notices = [n for n in (parse_listing_row(row) for row in rows[1:]) if n]
+    if not backfill:
+        limit = max_rows
+        if cursor.is_empty:
+            limit = min(limit or BOOTSTRAP_ROWS, BOOTSTRAP_ROWS)
+        fresh = cursor.select_new(notices)
+        if limit is not None: fresh = fresh[:limit]
+        # Rows that failed on earlier runs are retried even below the known rows
+        notices = cursor.retry_rows(skip=fresh) + fresh
+    elif max_rows is not None:
+        notices = notices[:max_rows]
+
+    metrics.inc("rows_selected", len(notices), pipeline="live")
+    if not notices:
+        print("✅ No new notices on the listing.")
+        return 0
+
+    # Warm the dedup index up front rather than racing to do it in the workers
+    refresh_dedup_index()
+
+    workers = max(1, min(concurrency or MAX_WORKERS, len(notices)))
+    print(f"📥 Fetching {len(notices)} notices with {workers} workers...")
+
+    # executor.map yields in submission order, so handling stays in listing order
+    fetched = []
+    saved = 0
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            fetched = list(pool.map(fetch_notice, notices))
+
+        new_notices = []
+        # Rows whose attachment another row of this run already carries wait
+        # for that row's save instead of being analyzed and pushed again
+        same_file = {}
+        for notice in fetched:
+            settled = triage_notice(notice)
+            if settled is None:
+                file_hash = notice["download"].file_hash
+                if file_hash in same_file:
+                    print("      ✅ Same attachment as an earlier notice in this run. Skipping.")
+                    same_file[file_hash].append(notice)
+                    continue
+                same_file[file_hash] = []
+                new_notices.append(notice)
+            elif settled:
+                cursor.mark_seen(notice["page_url"], notice["date"])
+
+        def settle_same_file(saved_notice):
+            file_hash = saved_notice["download"].file_hash
+            for other in same_file.get(file_hash, []):
+                get_dedup_index().record(other["file_url"], file_hash, notice_doc_id(saved_notice["title"]))
+                cursor.mark_seen(other["page_url"], other["date"])
+
+        if new_notices:
+            metrics.inc("notices_new", len(new_notices), pipeline="live")
+            # Re-uploaded scans and corrected notices reuse the original's analysis
+            new_notices, duplicates = split_near_duplicates(new_notices)
+
+            # 5. Gemini Analysis
+            analyses = []
+            if new_notices:
+                print(f"\n🧠 Analyzing {len(new_notices)} new notices...")
+                analyses = analyze_downloads_with_gemini([n["download"] for n in new_notices])
+            for notice, ai_data in zip(new_notices, analyses):
+                notice["ai_data"] = ai_data
+                if save_notice(notice, ai_data):
+                    cursor.mark_seen(notice["page_url"], notice["date"])
+                    settle_same_file(notice)
+                    saved += 1
+
+            for notice in duplicates:
+                match = notice["near_dup"]
+                if isinstance(match, dict):
+                    original_id, ai_data = notice_doc_id(match["title"]), match.get("ai_data")
+                else:
+                    original_id, ai_data = match.doc_id, match.analysis
+                if save_notice(notice, ai_data, duplicate_of=original_id):
+                    cursor.mark_seen(notice["page_url"], notice["date"])
+                    settle_same_file(notice)
+                    metrics.inc("notices_near_duplicate", pipeline="live")
+        metrics.inc("notices_saved", saved, pipeline="live")
+    finally:
+        # Cleanup
+        for notice in fetched:
+            if notice["download"]: notice["download"].close()
+        for notice in notices:
+            if not cursor.is_known(notice["page_url"]):
+                cursor.mark_failed(notice)
+        cursor.save()
+
+    stats = get_analysis_cache().stats()
+    print(f"\n🧠 Analysis cache: {stats['hits']} hits, {stats['misses']} misses")
+    return saved
+
+# ==========================================
+# 🔁 DAEMON MODE
+# ==========================================
+def next_poll_interval(now, last_change_at=None):
+    """
+    Seconds until the next check: quick right after a new notice, steady
+    during campus office hours, slower in the evening and slowest overnight.
+    """
+    if last_change_at and now - last_change_at < RECENT_CHANGE_WINDOW:
+        return POLL_AFTER_CHANGE
+    local = now.astimezone(CAMPUS_TZ)
+    if local.hour >= 22 or local.hour < 7:
+        return POLL_OVERNIGHT
+    # Notices go up Monday to Saturday
+    if local.weekday() < 6 and 9 <= local.hour < 18:
+        return POLL_OFFICE_HOURS
+    return POLL_OFF_HOURS
+
+def watch_live_scraper(concurrency=None):
+    """
+    Stays resident and re-runs the scraper on an adaptive interval. The HTTP
+    pool, Gemini client, Firebase app and local caches stay warm between
+    checks. SIGTERM/SIGINT let the current check finish, then exit.
+    """
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        print(f"\n🛑 Received signal {signum}, stopping after this check...")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    last_change_at = None
+    failures = 0
+    while not stop.is_set():
+        try:
+            if run_live_scraper(concurrency=concurrency):
+                last_change_at = datetime.now(timezone.utc)
+            failures = 0
+            interval = next_poll_interval(datetime.now(timezone.utc), last_change_at)
+        except Exception as e:
+            failures += 1
+            interval = min(POLL_OVERNIGHT, POLL_AFTER_CHANGE * 2 ** failures)
+            print(f"❌ Scraper run failed ({failures} in a row): {e}")
+
+        if not stop.is_set():
+            print(f"💤 Next check in {interval}s")
+            stop.wait(interval)
+
+    print("👋 Live scraper stopped.")
 
 if __name__ == "__main__":
-    run_live_scraper()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="CITK live notice scraper")
+    parser.add_argument("--rows", type=int, default=None, help="cap on new rows handled this run")
+    parser.add_argument("--backfill", action="store_true", help="ignore the crawl cursor and check every row")
+    parser.add_argument("--concurrency", type=int, default=None, help=f"worker threads (default {MAX_WORKERS})")
+    parser.add_argument("--watch", action="store_true", help="stay resident and poll on an adaptive interval")
+    args = parser.parse_args()
+
+    if args.watch:
+        watch_live_scraper(concurrency=args.concurrency)
+    else:
+        run_live_scraper(max_rows=args.rows, concurrency=args.concurrency, backfill=args.backfill)
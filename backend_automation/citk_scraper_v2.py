@@ -1,14 +1,14 @@
-import requests
-from bs4 import BeautifulSoup
 import json
+from http_fetch import fetch
+from html_parsing import parse_html
 
 def scrape_citk_notices():
     """Scrape latest notices from CITK website"""
     url = "https://cit.ac.in/notices"
     
     try:
-        response = requests.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
+        response = fetch(url)
+        soup = parse_html(response.content)
         
         notices = []
         # Adjust selectors based on actual website structure
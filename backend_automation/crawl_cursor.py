@@ -0,0 +1,115 @@
+"""
+Crawl Cursor for the CITK Live Scraper
+Remembers which listing rows were already handled, so each run only walks
+the listing until it reaches notices it has seen before
+"""
+
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from local_cache import atomic_write_json, cache_path, read_json
+
+
+def parse_listing_date(value: str) -> Optional[datetime]:
+    """Listing dates look like 09-01-2026 (DD-MM-YYYY)"""
+    for fmt in ("%d-%m-%Y", "%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value.strip(), fmt)
+        except (ValueError, AttributeError):
+            continue
+    return None
+
+
+class CrawlCursor:
+    """
+    Persisted set of seen listing URLs plus a date watermark, and the rows
+    that failed and still have to be retried
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_entries: int = 1000, max_attempts: int = 5):
+        self.path = Path(path) if path else cache_path("crawl_cursor.json")
+        self.max_entries = max_entries
+        self.max_attempts = max_attempts
+
+        state = read_json(self.path, default={}) or {}
+        self.seen: Dict[str, Dict] = state.get("seen", {})
+        self.watermark: Optional[str] = state.get("watermark")
+        # page_url -> listing row plus an attempt count
+        self.pending: Dict[str, Dict] = state.get("pending", {})
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.seen
+
+    def is_known(self, url: str) -> bool:
+        return url in self.seen
+
+    def mark_seen(self, url: str, date: str):
+        self.seen[url] = {"date": date, "seen_at": time.time()}
+        self.pending.pop(url, None)
+
+        row_date = parse_listing_date(date)
+        current = parse_listing_date(self.watermark) if self.watermark else None
+        if row_date and (current is None or row_date > current):
+            self.watermark = date
+
+    def mark_failed(self, notice: Dict):
+        """Remember a row that could not be processed, until it has failed `max_attempts` times"""
+        url = notice["page_url"]
+        attempts = self.pending.get(url, {}).get("attempts", 0) + 1
+        if attempts > self.max_attempts:
+            print(f"⚠️  Giving up on {url} after {self.max_attempts} attempts")
+            self.pending.pop(url, None)
+            return
+        self.pending[url] = {"title": notice["title"], "date": notice["date"], "page_url": url,
+                             "attempts": attempts}
+
+    def retry_rows(self, skip: List[Dict] = ()) -> List[Dict]:
+        """Failed rows to try again (listing fields only), except those already in `skip`"""
+        selected = {notice["page_url"] for notice in skip}
+        return [{key: row[key] for key in ("title", "date", "page_url")}
+                for url, row in self.pending.items() if url not in selected and url not in self.seen]
+
+    def select_new(self,
+                   notices: List[Dict],
+                   stop_after_known: int = 3,
+                   grace_days: int = 30) -> List[Dict]:
+        """
+        Walk `notices` (newest first) and return the unseen ones. The walk
+        stops after `stop_after_known` seen rows in a row - a single known row
+        may just be a pinned notice - or once rows fall `grace_days` behind
+        the watermark.
+        """
+        watermark = parse_listing_date(self.watermark) if self.watermark else None
+        oldest_allowed = watermark - timedelta(days=grace_days) if watermark else None
+
+        new_rows = []
+        known_streak = 0
+        for notice in notices:
+            if self.is_known(notice["page_url"]):
+                known_streak += 1
+                if known_streak >= stop_after_known:
+                    break
+                continue
+            known_streak = 0
+
+            row_date = parse_listing_date(notice.get("date", ""))
+            if oldest_allowed and row_date and row_date < oldest_allowed:
+                break
+            new_rows.append(notice)
+        return new_rows
+
+    def save(self):
+        # Keep only the most recently seen rows so the file stays small
+        if len(self.seen) > self.max_entries:
+            newest = sorted(self.seen.items(), key=lambda kv: kv[1]["seen_at"], reverse=True)
+            self.seen = dict(newest[:self.max_entries])
+
+        atomic_write_json(self.path, {
+            "seen": self.seen,
+            "watermark": self.watermark,
+            "pending": self.pending,
+            "updated_at": time.time(),
+        })
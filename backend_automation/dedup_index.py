@@ -0,0 +1,98 @@
+"""
+Local Deduplication Index for CITK Notices
+SQLite maps of attachment URL -> file hash and file hash -> Firestore doc id,
+so known notices are skipped without a download or a Firestore query
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+from local_cache import cache_path
+
+
+class DedupIndex:
+    """URL/hash lookup table, warmed in bulk from Firestore"""
+
+    def __init__(self, path: Optional[Path] = None, max_age_hours: float = 24):
+        self.path = Path(path) if path else cache_path("dedup_index.sqlite")
+        self.max_age = max_age_hours * 3600
+        self._lock = threading.Lock()
+
+        # Scraper worker threads share this one connection, guarded by the lock
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, file_hash TEXT NOT NULL);
+                CREATE TABLE IF NOT EXISTS hashes (file_hash TEXT PRIMARY KEY, doc_id TEXT NOT NULL);
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            """)
+
+    def needs_warmup(self) -> bool:
+        row = self._fetchone("SELECT value FROM meta WHERE key = 'warmed_at'")
+        return row is None or time.time() - float(row[0]) > self.max_age
+
+    def warm_from_firestore(self, db, collection: str = "live_notices") -> int:
+        """Load every (url, hash, doc id) triple from `collection` in one pass"""
+        docs = db.collection(collection).select(["file_hash", "meta.url"]).stream()
+
+        def triples() -> Iterable[Tuple[Optional[str], str, str]]:
+            for doc in docs:
+                data = doc.to_dict() or {}
+                file_hash = data.get("file_hash")
+                if file_hash:
+                    yield (data.get("meta") or {}).get("url"), file_hash, doc.id
+
+        return self.bulk_load(triples())
+
+    def warm_from_archive(self, path: Path) -> int:
+        """Same as warm_from_firestore, from the id/hash/url columns of a local notice archive"""
+        from notice_archive import read_archive
+
+        return self.bulk_load(
+            ((notice.get("meta") or {}).get("url"), notice["file_hash"], notice["id"])
+            for notice in read_archive(path, ["id", "file_hash", "meta.url"])
+            if notice.get("file_hash") and notice.get("id")
+        )
+
+    def bulk_load(self, triples: Iterable[Tuple[Optional[str], str, str]]) -> int:
+        count = 0
+        with self._lock, self.conn:
+            for url, file_hash, doc_id in triples:
+                self.conn.execute("INSERT OR REPLACE INTO hashes VALUES (?, ?)", (file_hash, doc_id))
+                if url:
+                    self.conn.execute("INSERT OR REPLACE INTO urls VALUES (?, ?)", (url, file_hash))
+                count += 1
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('warmed_at', ?)", (str(time.time()),))
+        return count
+
+    def hash_for_url(self, url: str) -> Optional[str]:
+        row = self._fetchone("SELECT file_hash FROM urls WHERE url = ?", (url,))
+        return row[0] if row else None
+
+    def doc_for_hash(self, file_hash: str) -> Optional[str]:
+        row = self._fetchone("SELECT doc_id FROM hashes WHERE file_hash = ?", (file_hash,))
+        return row[0] if row else None
+
+    def has_url(self, url: str) -> bool:
+        return self.hash_for_url(url) is not None
+
+    def has_hash(self, file_hash: str) -> bool:
+        return self.doc_for_hash(file_hash) is not None
+
+    def record(self, url: Optional[str], file_hash: str, doc_id: str):
+        """Keep the index in step with a Firestore write"""
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO hashes VALUES (?, ?)", (file_hash, doc_id))
+            if url:
+                self.conn.execute("INSERT OR REPLACE INTO urls VALUES (?, ?)", (url, file_hash))
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def _fetchone(self, sql: str, params: tuple = ()):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchone()
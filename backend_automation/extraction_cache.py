@@ -0,0 +1,102 @@
+"""
+Extraction Result Cache
+Content-addressed store of extracted text (raw bytes hash -> text, page
+count, extraction time), plus a URL -> hash map so a re-run can skip both
+the download and the parsing
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from local_cache import cache_path
+
+MAX_BYTES = int(float(os.environ.get("EXTRACTION_CACHE_MAX_MB", "64")) * 1024 * 1024)
+URL_TTL_HOURS = float(os.environ.get("EXTRACTION_CACHE_URL_TTL_HOURS", "168"))
+
+
+class ExtractionCache:
+    """SQLite cache of extracted text, evicted least-recently-used past `max_bytes`"""
+
+    def __init__(self, path: Optional[Path] = None, max_bytes: int = MAX_BYTES, url_ttl_hours: float = URL_TTL_HOURS):
+        self.path = Path(path) if path else cache_path("extraction_cache.sqlite")
+        self.max_bytes = max_bytes
+        self.url_ttl = url_ttl_hours * 3600
+        self._lock = threading.Lock()
+
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS extractions (
+                    key TEXT PRIMARY KEY,
+                    text TEXT NOT NULL,
+                    page_count INTEGER,
+                    seconds REAL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS extractions_lru ON extractions (last_access);
+                CREATE TABLE IF NOT EXISTS sources (
+                    url TEXT PRIMARY KEY,
+                    raw_hash TEXT NOT NULL,
+                    fetched_at REAL NOT NULL
+                );
+            """)
+
+    @staticmethod
+    def _key(raw_hash: str, variant: str) -> str:
+        # `variant` separates e.g. html text from PDF text cut at a given budget
+        return f"{raw_hash}:{variant}"
+
+    def hash_for_url(self, url: str) -> Optional[str]:
+        """Raw content hash last seen at `url`, if recent enough to trust"""
+        with self._lock:
+            row = self.conn.execute("SELECT raw_hash, fetched_at FROM sources WHERE url = ?", (url,)).fetchone()
+        if row is None or time.time() - row[1] > self.url_ttl:
+            return None
+        return row[0]
+
+    def record_url(self, url: str, raw_hash: str):
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?)", (url, raw_hash, time.time()))
+
+    def get(self, raw_hash: str, variant: str) -> Optional[Dict]:
+        key = self._key(raw_hash, variant)
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                "SELECT text, page_count, seconds FROM extractions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE extractions SET last_access = ? WHERE key = ?", (time.time(), key))
+        return {"text": row[0], "page_count": row[1], "seconds": row[2]}
+
+    def put(self, raw_hash: str, variant: str, text: str, page_count: Optional[int] = None, seconds: float = 0.0):
+        size = len(text.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO extractions VALUES (?, ?, ?, ?, ?, ?)",
+                (self._key(raw_hash, variant), text, page_count, seconds, size, time.time()),
+            )
+            self._evict()
+
+    def _evict(self):
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM extractions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self.conn.execute(
+            "SELECT key, size FROM extractions ORDER BY last_access ASC"
+        ).fetchall():
+            self.conn.execute("DELETE FROM extractions WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
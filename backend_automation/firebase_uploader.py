@@ -5,10 +5,20 @@ Securely uploads AI-processed data to Firestore
 
 import json
 from pathlib import Path
-from typing import List, Dict  # ADD THIS LINE
+from typing import Iterable, Dict, Optional
 import firebase_admin
 from firebase_admin import credentials, firestore
+from collections import defaultdict
 from datetime import datetime
+from crawl_cursor import parse_listing_date
+from firestore_writer import FirestoreWriter, WriteReport, WRITE_PARALLELISM
+from upload_manifest import get_upload_manifest
+
+# search_index/manifest lists the per-month shard documents
+SEARCH_INDEX_COLLECTION = "search_index"
+SEARCH_INDEX_MANIFEST = "manifest"
+# The single-document index used before month shards; removed once migrated
+SEARCH_INDEX_LEGACY = "notices_index"
 
 class CITKFirebaseUploader:
     """Upload CITK data to Firebase"""
@@ -21,31 +31,21 @@ class CITKFirebaseUploader:
         
         self.db = firestore.client()
     
-    def upload_notices(self, notices: List[Dict], collection: str = "notices"):
-        """Upload notices to Firestore"""
-        if not notices:
+    def upload_notices(self, notices: Iterable[Dict], collection: str = "notices",
+                       parallelism: Optional[int] = None, diff: bool = True) -> WriteReport:
+        """
+        Upload notices to Firestore, several 500-write batches at a time.
+        With `diff`, notices unchanged since the last upload are skipped.
+        """
+        writer = FirestoreWriter(self.db, parallelism=parallelism or WRITE_PARALLELISM)
+        report = writer.write(collection, ((notice['id'], notice) for notice in notices),
+                              manifest=get_upload_manifest() if diff else None)
+        # `notices` may be a stream, so emptiness is only known once it is consumed
+        if not (report.written or report.skipped or report.failed):
             print("⚠️  No notices to upload")
-            return
-        
-        batch = self.db.batch()
-        count = 0
-        
-        for notice in notices:
-            doc_ref = self.db.collection(collection).document(notice['id'])
-            batch.set(doc_ref, notice)
-            count += 1
-            
-            # Commit every 500 documents
-            if count % 500 == 0:
-                batch.commit()
-                batch = self.db.batch()
-                print(f"Uploaded {count} notices...")
-        
-        # Commit remaining
-        if count % 500 != 0:
-            batch.commit()
-        
-        print(f"✅ Total uploaded: {count} notices")
+            return report
+        report.print_summary("notices")
+        return report
     
     def upload_knowledge_base(self, knowledge_data: Dict):
         """Upload CITK knowledge base"""
@@ -66,34 +66,97 @@ class CITKFirebaseUploader:
             })
             print(f"✅ Uploaded {collection_name}")
     
-    def create_search_index(self, notices: List[Dict]):
-        """Create searchable index for AI queries"""
-        if not notices:
+    def create_search_index(self, notices: Iterable[Dict]):
+        """
+        Merge new or changed entries into the search index. Entries live in one
+        shard per notice month (search_index/notices_YYYY_MM, a map keyed by
+        notice id), and search_index/manifest lists the shards with their
+        sizes, so clients fetch only the months they need. Shards with
+        nothing new are not written at all. An entry whose month changed is
+        removed from its old shard, and the pre-shard search_index/notices_index
+        document is folded into the shards and deleted.
+        """
+        by_shard: Dict[str, Dict[str, Dict]] = defaultdict(dict)
+        total = 0
+        for notice in notices:
+            by_shard[self._index_shard(notice['meta']['date'])][notice['id']] = self._index_entry(notice)
+            total += 1
+        if not total:
             print("⚠️  No notices to index")
             return
         
-        index_data = []
+        index = self.db.collection(SEARCH_INDEX_COLLECTION)
+        legacy_ref = index.document(SEARCH_INDEX_LEGACY)
+        manifest = index.document(SEARCH_INDEX_MANIFEST).get()
+        known_shards = ((manifest.to_dict() or {}).get("shards", {}) if manifest.exists else {})
+        legacy = legacy_ref.get()
+        migrated = 0
+        if legacy.exists:
+            # Entries of the old single document that this upload does not replace
+            uploaded = {doc_id for entries in by_shard.values() for doc_id in entries}
+            for entry in (legacy.to_dict() or {}).get("entries", []):
+                if entry.get("id") and entry["id"] not in uploaded:
+                    by_shard[self._index_shard(entry.get("date", ""))][entry["id"]] = entry
+                    migrated += 1
         
-        for notice in notices:
-            index_entry = {
-                "id": notice['id'],
-                "title": notice['meta']['title'],
-                "category": notice['ai_analysis'].get('category', 'General'),
-                "keywords": notice['ai_analysis'].get('keywords', []),
-                "summary": notice['ai_analysis'].get('summary', ''),
-                "date": notice['meta']['date'],
-                "importance": notice['ai_analysis'].get('is_important', False)
-            }
-            index_data.append(index_entry)
+        # Every shard is read (one round-trip) so entries that moved month can be found
+        shards = sorted(by_shard.keys() | known_shards.keys())
+        refs = {shard: index.document(self._shard_doc(shard)) for shard in shards}
+        snapshots = {snap.id: snap for snap in self.db.get_all(list(refs.values()))}
+        existing = {
+            shard: ((snapshots[ref.id].to_dict() or {}).get("entries", {})
+                    if ref.id in snapshots and snapshots[ref.id].exists else {})
+            for shard, ref in refs.items()
+        }
+        target = {doc_id: shard for shard, entries in by_shard.items() for doc_id in entries}
         
-        # Upload index
-        doc_ref = self.db.collection("search_index").document("notices_index")
-        doc_ref.set({
-            "entries": index_data,
-            "updated_at": datetime.now(),
-            "total_count": len(index_data)
-        })
-        print(f"✅ Created search index with {len(index_data)} entries")
+        now = datetime.now()
+        manifest_updates = {}
+        written = moved = 0
+        for shard, ref in refs.items():
+            entries = by_shard.get(shard, {})
+            changed = {doc_id: entry for doc_id, entry in entries.items() if existing[shard].get(doc_id) != entry}
+            stale = [doc_id for doc_id in existing[shard] if target.get(doc_id, shard) != shard]
+            if not changed and not stale:
+                continue
+            
+            count = len((existing[shard].keys() | changed.keys()) - set(stale))
+            # merge=True merges the entries map, so only the changed entries are sent
+            update = dict(changed, **{doc_id: firestore.DELETE_FIELD for doc_id in stale})
+            ref.set({"entries": update, "month": shard, "count": count, "updated_at": now}, merge=True)
+            manifest_updates[shard] = {"doc": ref.id, "count": count, "updated_at": now}
+            written += len(changed)
+            moved += len(stale)
+        
+        if manifest_updates:
+            index.document(SEARCH_INDEX_MANIFEST).set({"shards": manifest_updates, "updated_at": now}, merge=True)
+        if legacy.exists:
+            legacy_ref.delete()
+            print(f"🧹 Moved {migrated} entries out of search_index/{SEARCH_INDEX_LEGACY} and deleted it")
+        print(f"✅ Search index: {written} entries updated in {len(manifest_updates)} shards "
+              f"({total + migrated - written} unchanged, {moved} removed from their old month)")
+    
+    @staticmethod
+    def _shard_doc(shard: str) -> str:
+        return f"notices_{shard.replace('-', '_')}"
+    
+    @staticmethod
+    def _index_entry(notice: Dict) -> Dict:
+        return {
+            "id": notice['id'],
+            "title": notice['meta']['title'],
+            "category": notice['ai_analysis'].get('category', 'General'),
+            "keywords": notice['ai_analysis'].get('keywords', []),
+            "summary": notice['ai_analysis'].get('summary', ''),
+            "date": notice['meta']['date'],
+            "importance": notice['ai_analysis'].get('is_important', False)
+        }
+    
+    @staticmethod
+    def _index_shard(date: str) -> str:
+        """Month of a notice as YYYY-MM, or 'undated'"""
+        parsed = parse_listing_date(date)
+        return parsed.strftime("%Y-%m") if parsed else "undated"
     
     def verify_upload(self):
         """Verify data was uploaded correctly"""
@@ -111,10 +174,11 @@ class CITKFirebaseUploader:
             print(f"   - Knowledge base: ❌ Not found")
         
         # Check search index
-        index_doc = self.db.collection("search_index").document("notices_index").get()
+        index_doc = self.db.collection(SEARCH_INDEX_COLLECTION).document(SEARCH_INDEX_MANIFEST).get()
         if index_doc.exists: # type: ignore
-            data = index_doc.to_dict() or {} # type: ignore
-            print(f"   - Search index: ✅ Found ({data.get('total_count', 0)} entries)")
+            shards = (index_doc.to_dict() or {}).get("shards", {}) # type: ignore
+            total = sum(shard.get("count", 0) for shard in shards.values())
+            print(f"   - Search index: ✅ Found ({total} entries in {len(shards)} shards)")
         else:
             print(f"   - Search index: ❌ Not found")
 
@@ -172,13 +236,12 @@ def setup_firebase_collections():
     db.collection("notices").document("sample_001").set(sample_notice)
     print("   ✅ notices created")
     
-    # 3. Create search_index collection
+    # 3. Create search_index collection (month shards are added by uploads)
     print("\n3️⃣  Creating search_index collection...")
-    db.collection("search_index").document("notices_index").set({
-        "entries": [],
-        "total_count": 0,
+    db.collection("search_index").document("manifest").set({
+        "shards": {},
         "created_at": datetime.now()
-    })
+    }, merge=True)
     print("   ✅ search_index created")
     
     # 4. Create users collection (if needed)
@@ -0,0 +1,201 @@
+"""
+Pipelined Firestore Writes for CITK Uploads
+Keeps several write batches in flight (or hands the work to Firestore's
+BulkWriter) and reports failures per document instead of aborting a batch
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from metrics import Metrics, get_metrics
+from upload_manifest import UploadManifest
+
+WRITE_PARALLELISM = int(os.environ.get("FIRESTORE_WRITE_PARALLELISM", "4"))
+# Firestore caps a batched write at 500 operations
+WRITE_BATCH_SIZE = int(os.environ.get("FIRESTORE_BATCH_SIZE", "500"))
+# "batch" (pipelined batched writes) or "bulk" (BulkWriter, with its own ramp-up and retries)
+WRITE_MODE = os.environ.get("FIRESTORE_WRITE_MODE", "batch")
+# In bulk mode, a document that still fails after this many attempts is reported as failed
+BULK_MAX_ATTEMPTS = int(os.environ.get("FIRESTORE_BULK_MAX_ATTEMPTS", "10"))
+
+
+@dataclass
+class WriteReport:
+    written: int = 0
+    failed: List[Tuple[str, str]] = field(default_factory=list)  # (doc id, error)
+    skipped: int = 0  # unchanged since the last upload (diff mode)
+    written_ids: List[str] = field(default_factory=list, repr=False)  # confirmed writes
+    seconds: float = 0.0
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.written / self.seconds if self.seconds else 0.0
+
+    def print_summary(self, noun: str = "documents"):
+        print(f"✅ Written: {self.written} {noun} in {self.seconds:.1f}s ({self.docs_per_second:.1f}/s)")
+        if self.skipped:
+            print(f"⏭️  Skipped: {self.skipped} unchanged {noun}")
+        if self.failed:
+            print(f"⚠️  {len(self.failed)} {noun} failed:")
+            for doc_id, error in self.failed[:10]:
+                print(f"   - {doc_id}: {error}")
+            if len(self.failed) > 10:
+                print(f"   ... and {len(self.failed) - 10} more")
+
+
+class FirestoreWriter:
+    """Writes (doc id, data) pairs into one collection with bounded parallelism"""
+
+    def __init__(self,
+                 db,
+                 parallelism: int = WRITE_PARALLELISM,
+                 batch_size: int = WRITE_BATCH_SIZE,
+                 mode: str = WRITE_MODE,
+                 metrics: Optional[Metrics] = None):
+        self.db = db
+        self.parallelism = max(1, parallelism)
+        self.batch_size = max(1, min(batch_size, 500))
+        self.mode = mode
+        self.metrics = metrics or get_metrics()
+        self._lock = threading.Lock()
+
+    def write(self, collection: str, docs: Iterable[Tuple[str, Dict]], merge: bool = False,
+              manifest: Optional[UploadManifest] = None) -> WriteReport:
+        """
+        With a `manifest`, documents whose digest matches the last upload are
+        skipped, and the manifest is updated for the ones that were written.
+        """
+        report = WriteReport()
+        started = time.perf_counter()
+        pending: Dict[str, str] = {}
+        seen = [0]
+        if manifest is not None:
+            docs = manifest.select_changed(collection, _counted(docs, seen), pending)
+        if self.mode == "bulk" and hasattr(self.db, "bulk_writer"):
+            self._write_bulk(collection, docs, merge, report)
+        else:
+            self._write_batches(collection, docs, merge, report)
+        report.seconds = time.perf_counter() - started
+
+        if manifest is not None:
+            report.skipped = seen[0] - len(pending)
+            # Only documents the writer confirmed; anything else is retried next time
+            manifest.record(collection, {doc_id: pending[doc_id] for doc_id in report.written_ids
+                                         if doc_id in pending})
+            self.metrics.inc("documents_skipped", report.skipped, pipeline="upload", collection=collection)
+        self.metrics.inc("documents_written", report.written, pipeline="upload", collection=collection)
+        self.metrics.inc("documents_failed", len(report.failed), pipeline="upload", collection=collection)
+        return report
+
+    # ---- pipelined batched writes ----
+
+    def _write_batches(self, collection: str, docs: Iterable[Tuple[str, Dict]], merge: bool, report: WriteReport):
+        """
+        Chunks are committed on a thread pool with at most `parallelism`
+        commits in flight, so the input is never fully materialized. A chunk
+        whose commit fails is retried document by document to isolate the
+        bad ones. Every document ends up either written or failed.
+        """
+        ref = self.db.collection(collection).document
+        in_flight = threading.BoundedSemaphore(self.parallelism)
+        futures = []
+
+        def commit(chunk):
+            try:
+                self._commit_chunk(chunk, merge, report)
+            finally:
+                in_flight.release()
+
+        def submit(chunk):
+            in_flight.acquire()
+            futures.append((pool.submit(commit, chunk), chunk))
+
+        with ThreadPoolExecutor(max_workers=self.parallelism) as pool:
+            chunk: List = []
+            for doc_id, data in docs:
+                try:
+                    chunk.append((ref(doc_id), data))
+                except Exception as e:
+                    self._record(report, [], (doc_id, str(e)))
+                    continue
+                if len(chunk) >= self.batch_size:
+                    submit(chunk)
+                    chunk = []
+            if chunk:
+                submit(chunk)
+
+        for future, chunk in futures:
+            error = future.exception()
+            if error is not None:
+                # _commit_chunk records a chunk only once it is done with it
+                for doc_ref, _ in chunk:
+                    self._record(report, [], (doc_ref.id, str(error)))
+
+    def _commit_chunk(self, chunk: List, merge: bool, report: WriteReport):
+        try:
+            batch = self.db.batch()
+            for doc_ref, data in chunk:
+                batch.set(doc_ref, data, merge=merge)
+            with self.metrics.time("batch_commit", pipeline="upload"):
+                batch.commit()
+            self._record(report, [doc_ref.id for doc_ref, _ in chunk])
+            return
+        except Exception as e:
+            print(f"   ⚠️ Batch of {len(chunk)} failed ({e}), retrying one by one...")
+
+        written: List[str] = []
+        failed: List[Tuple[str, str]] = []
+        for doc_ref, data in chunk:
+            try:
+                doc_ref.set(data, merge=merge)
+                written.append(doc_ref.id)
+            except Exception as e:
+                failed.append((doc_ref.id, str(e)))
+        self._record(report, written)
+        for failure in failed:
+            self._record(report, [], failure)
+
+    def _record(self, report: WriteReport, written: List[str], failure: Optional[Tuple[str, str]] = None):
+        with self._lock:
+            before = report.written
+            report.written += len(written)
+            report.written_ids.extend(written)
+            if failure:
+                report.failed.append(failure)
+            # Progress line roughly every 500 documents
+            if report.written // 500 > before // 500:
+                print(f"   💾 Saved {report.written} documents...")
+
+    # ---- BulkWriter ----
+
+    def _write_bulk(self, collection: str, docs: Iterable[Tuple[str, Dict]], merge: bool, report: WriteReport):
+        """BulkWriter ramps up throughput itself and retries transient errors"""
+        bulk = self.db.bulk_writer()
+
+        def on_result(doc_ref, result, writer):
+            self._record(report, [doc_ref.id])
+
+        def on_error(failure, writer):
+            # Retry up to BULK_MAX_ATTEMPTS, then report the document as failed
+            if failure.attempts < BULK_MAX_ATTEMPTS:
+                return True
+            self._record(report, [], (failure.operation.reference.id, str(failure.message)))
+            return False
+
+        bulk.on_write_result(on_result)
+        bulk.on_write_error(on_error)
+        ref = self.db.collection(collection).document
+        for doc_id, data in docs:
+            bulk.set(ref(doc_id), data, merge=merge)
+        with self.metrics.time("bulk_flush", pipeline="upload"):
+            bulk.close()
+
+
+def _counted(docs: Iterable[Tuple[str, Dict]], seen: List[int]) -> Iterator[Tuple[str, Dict]]:
+    for doc in docs:
+        seen[0] += 1
+        yield doc
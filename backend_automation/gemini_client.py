@@ -0,0 +1,54 @@
+"""
+Long-Lived Gemini Client
+Configures the SDK and builds the GenerativeModel once, on first use,
+instead of once per notice
+"""
+
+import threading
+from typing import Dict, Optional
+
+# genai.configure() sets process-wide state, so it is tracked per process
+_configure_lock = threading.Lock()
+_configured_key: Optional[str] = None
+
+
+def _configure(api_key: Optional[str]):
+    global _configured_key
+    import google.generativeai as genai
+
+    with _configure_lock:
+        if _configured_key != api_key:
+            genai.configure(api_key=api_key)  # type: ignore
+            _configured_key = api_key
+    return genai
+
+
+class GeminiClient:
+    """Lazily created GenerativeModel with a fixed name and generation config"""
+
+    def __init__(self, api_key: Optional[str], model_name: str, generation_config: Optional[Dict] = None):
+        self.api_key = api_key
+        self.model_name = model_name
+        self.generation_config = generation_config
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def genai(self):
+        """The configured SDK module, for file upload helpers"""
+        return _configure(self.api_key)
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    genai = self.genai
+                    self._model = genai.GenerativeModel(  # type: ignore
+                        model_name=self.model_name,
+                        generation_config=self.generation_config,
+                    )
+        return self._model
+
+    def generate(self, contents):
+        return self.model.generate_content(contents)
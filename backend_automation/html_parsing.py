@@ -0,0 +1,39 @@
+"""
+HTML Parsing Backend for CITK Scrapers
+Uses lxml when it is installed (falling back to the pure-Python
+'html.parser') and builds only the part of the tree a caller needs
+"""
+
+import importlib.util
+import os
+from typing import List, Optional
+
+
+def best_parser() -> str:
+    """HTML_PARSER from the environment, else lxml if importable, else html.parser"""
+    configured = os.environ.get("HTML_PARSER")
+    if configured:
+        return configured
+    # find_spec checks for lxml without paying for the import up front
+    return "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+
+PARSER = best_parser()
+
+
+def parse_html(markup, parse_only=None, parser: Optional[str] = None):
+    """BeautifulSoup with the fastest available parser, optionally strained"""
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(markup, parser or PARSER, parse_only=parse_only)
+
+
+def parse_listing_rows(markup, parser: Optional[str] = None) -> List:
+    """Only the <tr> elements of the notice listing (and what they contain)"""
+    from bs4 import SoupStrainer
+    return parse_html(markup, SoupStrainer("tr"), parser).find_all("tr")
+
+
+def parse_links(markup, parser: Optional[str] = None) -> List:
+    """Only the <a href> elements of a page"""
+    from bs4 import SoupStrainer
+    return parse_html(markup, SoupStrainer("a", href=True), parser).find_all("a", href=True)
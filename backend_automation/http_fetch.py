@@ -0,0 +1,360 @@
+"""
+Shared HTTP Fetch Layer for CITK Scrapers
+One pooled keep-alive session, jittered retries and ETag/Last-Modified
+revalidation, so unchanged pages and PDFs cost a 304 instead of a full body
+"""
+
+import hashlib
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from local_cache import atomic_write_bytes, atomic_write_json, atomic_write_stream, cache_path, read_json
+
+USER_AGENT = "Mozilla/5.0"
+POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "10"))
+MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", "3"))
+
+# Status codes worth another attempt; everything else is returned as-is
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Downloads stay in memory up to this size, then spill to a private temp file
+CHUNK_SIZE = 64 * 1024
+SPOOL_MAX_BYTES = int(os.environ.get("HTTP_SPOOL_MAX_BYTES", str(4 * 1024 * 1024)))
+
+# The validator store is kept between CI runs by actions/cache, so it is
+# capped: bodies above the per-body limit are not stored at all (those URLs
+# are simply fetched in full each time), and once the store outgrows its total
+# the least recently used entries are evicted
+VALIDATOR_MAX_BYTES = int(os.environ.get("HTTP_VALIDATOR_MAX_BYTES", str(64 * 1024 * 1024)))
+VALIDATOR_MAX_BODY_BYTES = int(os.environ.get("HTTP_VALIDATOR_MAX_BODY_BYTES", str(8 * 1024 * 1024)))
+
+
+@dataclass
+class FetchResult:
+    """Response body plus whether it was served from the validator store"""
+    url: str
+    status_code: int
+    content: bytes
+    encoding: Optional[str] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    not_modified: bool = False
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+
+class Download:
+    """
+    A streamed download: the body sits in a spooled temp file that belongs to
+    this object alone, and `file_hash` (MD5) was computed while it arrived.
+    """
+
+    def __init__(self, url: str, file: BinaryIO, file_hash: str, size: int,
+                 content_type: Optional[str] = None, not_modified: bool = False):
+        self.url = url
+        self.file = file
+        self.file_hash = file_hash
+        self.size = size
+        self.content_type = content_type
+        self.not_modified = not_modified
+
+    def read(self) -> bytes:
+        self.file.seek(0)
+        return self.file.read()
+
+    @contextmanager
+    def as_path(self, suffix: str = ""):
+        """Materialize the body as a named file, for APIs that only take paths"""
+        fd, path = tempfile.mkstemp(suffix=suffix, prefix="citk_dl_")
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                self.file.seek(0)
+                shutil.copyfileobj(self.file, out, CHUNK_SIZE)
+            yield path
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def hash_stream(stream: BinaryIO, chunk_size: int = CHUNK_SIZE) -> str:
+    """MD5 of a binary stream, read in chunks"""
+    hasher = hashlib.md5()
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class ValidatorStore:
+    """
+    On-disk store of ETag/Last-Modified validators and the body they belong to.
+    Each URL gets its own `<sha1>.json` + `<sha1>.body` pair, so concurrent
+    workers never fight over one shared file. Bodies over `max_body_bytes`
+    are not kept, and the store is trimmed back to `max_bytes` after each save,
+    dropping the entries whose bodies were used least recently.
+    """
+
+    def __init__(self, directory: Path,
+                 max_bytes: int = VALIDATOR_MAX_BYTES,
+                 max_body_bytes: int = VALIDATOR_MAX_BODY_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_body_bytes = max_body_bytes
+        self._evict_lock = threading.Lock()
+
+    def _paths(self, url: str):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return self.directory / f"{key}.json", self.directory / f"{key}.body"
+
+    def load(self, url: str) -> Optional[Dict]:
+        meta_path, body_path = self._paths(url)
+        meta = read_json(meta_path)
+        if not meta or meta.get("url") != url or not body_path.exists():
+            return None
+        return meta
+
+    def load_body(self, url: str) -> bytes:
+        body_path = self._paths(url)[1]
+        content = body_path.read_bytes()
+        _touch(body_path)
+        return content
+
+    def open_body(self, url: str) -> BinaryIO:
+        body_path = self._paths(url)[1]
+        body = open(body_path, 'rb')
+        _touch(body_path)
+        return body
+
+    def save(self, url: str, response: requests.Response, body: Optional[BinaryIO] = None):
+        """Store validators and body; `body` is used instead of response.content for streamed responses"""
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+
+        meta_path, body_path = self._paths(url)
+        size = len(response.content) if body is None else body.seek(0, os.SEEK_END)
+        if size > self.max_body_bytes:
+            # Too big to keep; drop any older copy so it is not revalidated against
+            self._remove(meta_path, body_path)
+            return
+
+        if body is None:
+            atomic_write_bytes(body_path, response.content)
+        else:
+            atomic_write_stream(body_path, body)
+        atomic_write_json(meta_path, {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "encoding": response.encoding,
+            "saved_at": time.time(),
+        })
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the bodies fit in max_bytes"""
+        with self._evict_lock:
+            entries = []
+            for body_path in self.directory.glob("*.body"):
+                try:
+                    stat = body_path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, body_path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, body_path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(body_path.with_suffix(".json"), body_path)
+                total -= size
+
+    @staticmethod
+    def _remove(*paths: Path):
+        for path in paths:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _touch(path: Path):
+    """Mark a stored body as recently used (eviction goes by mtime)"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+class Fetcher:
+    """Pooled GET client with retries and conditional requests"""
+
+    def __init__(self,
+                 pool_size: int = POOL_SIZE,
+                 max_retries: int = MAX_RETRIES,
+                 backoff: float = 0.5,
+                 backoff_cap: float = 10.0,
+                 cache_dir: Optional[Path] = None):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_cap = backoff_cap
+        self.validators = ValidatorStore(cache_dir) if cache_dir else None
+
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        # Retries are handled below so they get jitter and Retry-After support
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url: str, timeout: float = 20, revalidate: bool = True) -> FetchResult:
+        """
+        GET `url`. With `revalidate`, a stored ETag/Last-Modified is sent along
+        and a 304 is answered from the stored body (`not_modified=True`).
+        """
+        meta = self._validators_for(url, revalidate)
+        response = self._request(url, self._conditional_headers(meta), timeout)
+
+        if response.status_code == 304 and meta:
+            try:
+                content = self.validators.load_body(url)  # type: ignore
+            except FileNotFoundError:
+                # Evicted since its validators were read: fetch it in full
+                return self.get(url, timeout, revalidate=False)
+            return FetchResult(
+                url=url,
+                status_code=200,
+                content=content,
+                encoding=meta.get("encoding"),
+                headers=dict(response.headers),
+                not_modified=True,
+            )
+
+        if response.status_code == 200 and revalidate and self.validators:
+            self.validators.save(url, response)
+
+        return FetchResult(
+            url=url,
+            status_code=response.status_code,
+            content=response.content,
+            encoding=response.encoding,
+            headers=dict(response.headers),
+        )
+
+    def download(self, url: str, timeout: float = 20, revalidate: bool = True) -> Download:
+        """
+        Stream `url` into a spooled temp file, hashing each chunk as it lands,
+        so the body is never held twice in memory. Raises on non-200 answers.
+        """
+        meta = self._validators_for(url, revalidate)
+        response = self._request(url, self._conditional_headers(meta), timeout, stream=True)
+
+        with response:
+            if response.status_code == 304 and meta:
+                try:
+                    body = self.validators.open_body(url)  # type: ignore
+                except FileNotFoundError:
+                    # Evicted since its validators were read: fetch it in full
+                    return self.download(url, timeout, revalidate=False)
+                file_hash = hash_stream(body)
+                size = body.tell()
+                body.seek(0)
+                return Download(url, body, file_hash, size,
+                                content_type=response.headers.get("Content-Type"), not_modified=True)
+
+            response.raise_for_status()
+            if response.status_code != 200:
+                raise requests.HTTPError(f"Unexpected status {response.status_code} for {url}", response=response)
+
+            spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+            hasher = hashlib.md5()
+            size = 0
+            try:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    hasher.update(chunk)
+                    spool.write(chunk)
+                    size += len(chunk)
+                if revalidate and self.validators:
+                    self.validators.save(url, response, body=spool)
+            except BaseException:
+                spool.close()
+                raise
+
+        spool.seek(0)
+        return Download(url, spool, hasher.hexdigest(), size,  # type: ignore
+                        content_type=response.headers.get("Content-Type"))
+
+    def _validators_for(self, url: str, revalidate: bool) -> Optional[Dict]:
+        return self.validators.load(url) if (revalidate and self.validators) else None
+
+    @staticmethod
+    def _conditional_headers(meta: Optional[Dict]) -> Dict[str, str]:
+        headers = {}
+        if meta:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def _request(self, url: str, headers: Dict[str, str], timeout: float, **kwargs) -> requests.Response:
+        attempt = 0
+        while True:
+            try:
+                response = self.session.get(url, headers=headers, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                retry_after = response.headers.get("Retry-After", "")
+                response.close()
+                if retry_after.isdigit():
+                    time.sleep(min(int(retry_after), self.backoff_cap))
+                    attempt += 1
+                    continue
+
+            time.sleep(self._backoff_delay(attempt))
+            attempt += 1
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self.backoff_cap, self.backoff * (2 ** attempt)))
+
+
+_default_fetcher: Optional[Fetcher] = None
+_default_lock = threading.Lock()
+
+
+def get_fetcher() -> Fetcher:
+    """Process-wide fetcher, so every scraper shares one connection pool"""
+    global _default_fetcher
+    with _default_lock:
+        if _default_fetcher is None:
+            _default_fetcher = Fetcher(cache_dir=cache_path("http", "validators"))
+        return _default_fetcher
+
+
+def fetch(url: str, timeout: float = 20, revalidate: bool = True) -> FetchResult:
+    return get_fetcher().get(url, timeout=timeout, revalidate=revalidate)
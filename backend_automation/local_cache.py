@@ -0,0 +1,67 @@
+"""
+Local Cache Directory for CITK Automation
+Small helpers for state that has to survive between scraper runs
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Iterable
+
+# Override with CITK_CACHE_DIR (e.g. to point CI at a restored cache folder)
+CACHE_DIR = Path(os.environ.get("CITK_CACHE_DIR", Path(__file__).resolve().parent / ".cache"))
+
+
+def cache_path(*parts: str) -> Path:
+    """Path inside the cache directory, creating parent folders as needed"""
+    path = CACHE_DIR.joinpath(*parts)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def atomic_write_bytes(path: Path, data: bytes):
+    """Write a file so readers never see a half-written version"""
+    _atomic_write(path, lambda f: f.write(data))
+
+
+def atomic_write_stream(path: Path, stream: BinaryIO):
+    """Like atomic_write_bytes, but copies from a file object in chunks"""
+    stream.seek(0)
+    _atomic_write(path, lambda f: shutil.copyfileobj(stream, f, 64 * 1024))
+
+
+def atomic_write_chunks(path: Path, chunks: Iterable[bytes]):
+    """Like atomic_write_bytes, but for content produced piece by piece"""
+    def write(f):
+        for chunk in chunks:
+            f.write(chunk)
+    _atomic_write(path, write)
+
+
+def _atomic_write(path: Path, write):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_json(path: Path, data):
+    atomic_write_bytes(path, json.dumps(data, indent=2).encode('utf-8'))
+
+
+def read_json(path: Path, default=None):
+    """Load a JSON state file, falling back to `default` if missing or corrupt"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
@@ -0,0 +1,258 @@
+"""
+Pipeline Metrics for CITK Automation
+Per-stage timing histograms and counters, written out as a JSON run summary
+and a Prometheus textfile (for node_exporter's textfile collector)
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from local_cache import atomic_write_bytes, atomic_write_json, cache_path
+
+# CITK_METRICS=0 turns every call below into a no-op
+METRICS_ENABLED = os.environ.get("CITK_METRICS", "1").lower() not in ("0", "false", "off")
+# Where <run>.json and <run>.prom are written (defaults to .cache/metrics)
+METRICS_DIR = os.environ.get("METRICS_DIR")
+
+# Histogram bucket upper bounds in seconds, from a hash to a Gemini upload
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Histogram:
+    """Fixed-bucket histogram; quantiles are interpolated within a bucket"""
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        index = 0
+        while index < len(BUCKETS) and value > BUCKETS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = BUCKETS[index - 1] if index else 0.0
+                upper = BUCKETS[index] if index < len(BUCKETS) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - seen) / bucket_count)
+            seen += bucket_count
+        return self.max
+
+
+class _StageTimer:
+    __slots__ = ("metrics", "key", "started")
+
+    def __init__(self, metrics: "Metrics", key: LabelKey):
+        self.metrics = metrics
+        self.key = key
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics._observe_key("stage_seconds", self.key, time.perf_counter() - self.started)
+        if exc_type is not None:
+            self.metrics._inc_key("stage_errors", self.key, 1)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """
+    Thread-safe counters and stage-duration histograms. The Prometheus output
+    covers the whole process; the JSON summary and report() cover the current
+    run, which start_run() begins (a long-lived --watch process runs many).
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters: Dict[Tuple[str, LabelKey], float] = {}
+            self.histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+        self.start_run()
+
+    def start_run(self):
+        """Begin a new run summary; the cumulative Prometheus series keep counting"""
+        with self._lock:
+            self.run_counters: Dict[Tuple[str, LabelKey], float] = {}
+            self.run_histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+            self.started_at = datetime.now().isoformat()
+            self._started = time.perf_counter()
+
+    # ---- recording ----
+
+    def inc(self, name: str, value: float = 1, **labels):
+        if self.enabled:
+            self._inc_key(name, _label_key(labels), value)
+
+    def observe(self, name: str, seconds: float, **labels):
+        if self.enabled:
+            self._observe_key(name, _label_key(labels), seconds)
+
+    def time(self, stage: str, **labels):
+        """Context manager timing one pass through `stage`"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, _label_key(dict(labels, stage=stage)))
+
+    def timed(self, stage: str, **labels):
+        """Decorator form of time()"""
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.time(stage, **labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _inc_key(self, name: str, key: LabelKey, value: float):
+        with self._lock:
+            for counters in (self.counters, self.run_counters):
+                counters[(name, key)] = counters.get((name, key), 0) + value
+
+    def _observe_key(self, name: str, key: LabelKey, seconds: float):
+        with self._lock:
+            for histograms in (self.histograms, self.run_histograms):
+                histogram = histograms.get((name, key))
+                if histogram is None:
+                    histogram = histograms[(name, key)] = Histogram()
+                histogram.observe(seconds)
+
+    # ---- output ----
+
+    def summary(self) -> Dict:
+        with self._lock:
+            counters = [{"name": name, "labels": dict(key), "value": value}
+                        for (name, key), value in sorted(self.run_counters.items())]
+            histograms = [{
+                "name": name,
+                "labels": dict(key),
+                "count": h.count,
+                "sum_seconds": round(h.sum, 6),
+                "p50_seconds": round(h.quantile(0.5), 6),
+                "p95_seconds": round(h.quantile(0.95), 6),
+                "max_seconds": round(h.max, 6),
+            } for (name, key), h in sorted(self.run_histograms.items())]
+        return {
+            "started_at": self.started_at,
+            "wall_seconds": round(time.perf_counter() - self._started, 3),
+            "counters": counters,
+            "histograms": histograms,
+        }
+
+    def prometheus_text(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted({n for n, _ in self.counters}):
+                metric = f"citk_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                for (n, key), value in sorted(self.counters.items()):
+                    if n == name:
+                        lines.append(f"{metric}{_format_labels(key)} {value}")
+            for name in sorted({n for n, _ in self.histograms}):
+                metric = f"citk_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                for (n, key), h in sorted(self.histograms.items()):
+                    if n != name:
+                        continue
+                    cumulative = 0
+                    for bound, bucket_count in zip(BUCKETS + (float("inf"),), h.counts):
+                        cumulative += bucket_count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{metric}_bucket{_format_labels(key + (('le', le),))} {cumulative}")
+                    lines.append(f"{metric}_sum{_format_labels(key)} {h.sum}")
+                    lines.append(f"{metric}_count{_format_labels(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def report(self, title: str, wall_seconds: Optional[float] = None, workers: Optional[int] = None, **labels):
+        """Print a per-stage table for the stages matching `labels`"""
+        if not self.enabled:
+            return
+        wall = wall_seconds if wall_seconds is not None else time.perf_counter() - self._started
+        wanted = set(_label_key(labels))
+        suffix = f", {workers} workers" if workers else ""
+        print(f"\n⏱️  {title} ({wall:.1f}s wall{suffix}):")
+        with self._lock:
+            for (name, key), h in sorted(self.run_histograms.items()):
+                if name != "stage_seconds" or not wanted <= set(key):
+                    continue
+                stage = dict(key)["stage"]
+                per_sec = h.count / wall if wall else 0.0
+                print(f"   - {stage}: {h.count} items, avg {h.sum / h.count:.2f}s, "
+                      f"p95 {h.quantile(0.95):.2f}s, {per_sec:.2f} items/s")
+
+    def flush(self, run_name: str) -> Optional[Path]:
+        """Write <run_name>.json and <run_name>.prom; returns the JSON path"""
+        if not self.enabled:
+            return None
+        try:
+            base = Path(METRICS_DIR) if METRICS_DIR else cache_path("metrics")
+            json_path = base / f"{run_name}.json"
+            atomic_write_json(json_path, dict(self.summary(), run=run_name))
+            atomic_write_bytes(base / f"{run_name}.prom", self.prometheus_text().encode('utf-8'))
+            print(f"📈 Metrics written to {json_path}")
+            return json_path
+        except OSError as e:
+            print(f"⚠️ Could not write metrics: {e}")
+            return None
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    escape = lambda v: v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    body = ",".join(f'{k}="{escape(v)}"' for k, v in key)
+    return "{" + body + "}"
+
+
+_metrics: Optional[Metrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """Process-wide Metrics instance shared by the scraper, processor and uploader"""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+        return _metrics
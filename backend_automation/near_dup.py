@@ -0,0 +1,157 @@
+"""
+Near-Duplicate Notice Detection
+MinHash signatures over word shingles of extracted text, with an LSH band
+index in SQLite so a new notice is only compared against likely matches
+"""
+
+import array
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from local_cache import cache_path
+
+# Estimated Jaccard similarity at or above which two notices are the same notice
+NEAR_DUP_THRESHOLD = float(os.environ.get("NEAR_DUP_THRESHOLD", "0.85"))
+# Texts shorter than this (blank scans, one-line notices) are never matched
+NEAR_DUP_MIN_TOKENS = int(os.environ.get("NEAR_DUP_MIN_TOKENS", "30"))
+
+SHINGLE_SIZE = 3
+NUM_PERM = 64
+# 16 bands of 4 rows: pairs above ~0.6 similarity almost always share a band
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+_PRIME = (1 << 61) - 1
+# Fixed seed: signatures stored in the index must stay comparable across runs
+_rng = random.Random(0xC17C)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def minhash_signature(text: str) -> Optional[array.array]:
+    """MinHash of the text's word 3-gram shingles, or None if it is too short to judge"""
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) < NEAR_DUP_MIN_TOKENS:
+        return None
+    shingles = {
+        int.from_bytes(hashlib.blake2b(" ".join(tokens[i:i + SHINGLE_SIZE]).encode('utf-8'), digest_size=8).digest(), 'little')
+        for i in range(len(tokens) - SHINGLE_SIZE + 1)
+    }
+    return array.array('Q', (min((a * s + b) % _PRIME for s in shingles) for a, b in _PERMS))
+
+
+def similarity(left: array.array, right: array.array) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for x, y in zip(left, right) if x == y) / NUM_PERM
+
+
+def _band_keys(signature: array.array) -> List[bytes]:
+    return [
+        hashlib.blake2b(signature[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).digest()
+        for band in range(BANDS)
+    ]
+
+
+@dataclass
+class NearDuplicate:
+    doc_id: str
+    similarity: float
+    analysis: Optional[Dict]
+
+
+class NearDupIndex:
+    """Signatures (and the AI analysis) of notices already processed, with LSH buckets"""
+
+    def __init__(self, path: Path, threshold: float = NEAR_DUP_THRESHOLD):
+        self.path = Path(path)
+        self.threshold = threshold
+        self._lock = threading.Lock()
+
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS signatures (
+                    doc_id TEXT PRIMARY KEY,
+                    signature BLOB NOT NULL,
+                    analysis TEXT,
+                    added_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS buckets (
+                    band INTEGER NOT NULL,
+                    bucket BLOB NOT NULL,
+                    doc_id TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS buckets_lookup ON buckets (band, bucket);
+            """)
+
+    def find(self, signature: Optional[array.array], exclude: Optional[str] = None) -> Optional[NearDuplicate]:
+        """
+        Most similar known notice at or above the threshold, if any. `exclude`
+        is the notice's own doc id, so re-processing a notice never matches itself.
+        """
+        if signature is None:
+            return None
+        keys = _band_keys(signature)
+        with self._lock:
+            candidates = {
+                row[0] for band, key in enumerate(keys)
+                for row in self.conn.execute(
+                    "SELECT doc_id FROM buckets WHERE band = ? AND bucket = ?", (band, key)
+                )
+            }
+            best = None
+            candidates.discard(exclude)
+            for doc_id in candidates:
+                row = self.conn.execute(
+                    "SELECT signature, analysis FROM signatures WHERE doc_id = ?", (doc_id,)
+                ).fetchone()
+                if row is None:
+                    continue
+                score = similarity(signature, array.array('Q', row[0]))
+                if score >= self.threshold and (best is None or score > best.similarity):
+                    best = NearDuplicate(doc_id, score, json.loads(row[1]) if row[1] else None)
+        return best
+
+    def add(self, doc_id: str, signature: Optional[array.array], analysis: Optional[Dict] = None):
+        if signature is None:
+            return
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM buckets WHERE doc_id = ?", (doc_id,))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO signatures VALUES (?, ?, ?, ?)",
+                (doc_id, signature.tobytes(), json.dumps(analysis) if analysis else None, time.time()),
+            )
+            self.conn.executemany(
+                "INSERT INTO buckets VALUES (?, ?, ?)",
+                [(band, key, doc_id) for band, key in enumerate(_band_keys(signature))],
+            )
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+_indexes: Dict[str, NearDupIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_near_dup_index(collection: str) -> NearDupIndex:
+    """
+    Process-wide index for one Firestore collection. The live scraper
+    ("live_notices") and the batch processor ("notices") use different doc
+    ids and analysis schemas, so each keeps its own file and a match always
+    points at a document of the same collection.
+    """
+    with _indexes_lock:
+        if collection not in _indexes:
+            _indexes[collection] = NearDupIndex(cache_path(f"near_dup_{collection}.sqlite"))
+        return _indexes[collection]
@@ -0,0 +1,298 @@
+"""
+Columnar Notice Archive
+Compact on-disk form of the notice database: one compressed block per field,
+repeated strings (categories, audiences, keywords) interned, and a lossless
+round-trip to the JSON records. Readers decompress only the columns they ask for.
+
+    python backend_automation/notice_archive.py pack backend_automation/citk_master_database.json
+    python backend_automation/notice_archive.py info backend_automation/citk_master_database.citkarc
+    python backend_automation/notice_archive.py unpack backend_automation/citk_master_database.citkarc --out db.json
+"""
+
+import array
+import json
+import struct
+import sys
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from local_cache import atomic_write_chunks
+
+try:
+    import zstandard  # optional: smaller and faster than zlib
+except ImportError:
+    zstandard = None
+
+# ==========================================
+# 📦 FORMAT
+# ==========================================
+# MAGIC, uint32 header length, JSON header, then the compressed blocks.
+# The header lists every column (its key path, encoding and block) plus the
+# "shapes" block: each distinct key layout of a record as a list of column
+# numbers in original key order, and the layout number of every record.
+# Records are split into leaves at every non-empty dict, so "meta.title" and
+# "ai_analysis.category" are columns while lists and scalars are values.
+
+MAGIC = b"CITKARC1"
+ARCHIVE_SUFFIX = ".citkarc"
+DEFAULT_CODEC = "zstd" if zstandard else "zlib"
+# String columns with at most this share of distinct values are interned
+INTERN_RATIO = 0.5
+
+KeyPath = Tuple[str, ...]
+
+
+def _compress(codec: str, data: bytes) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return zlib.compress(data, 6)
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("This archive is zstd-compressed: pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def _json(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _uint32s(values: Iterable[int]) -> bytes:
+    packed = array.array('I', values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _read_uint32s(data: bytes) -> array.array:
+    values = array.array('I')
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _intern(values: Iterable[str], table: Dict[str, int]) -> List[int]:
+    return [table.setdefault(value, len(table)) for value in values]
+
+
+# ==========================================
+# ✍️ WRITER
+# ==========================================
+
+def _flatten(record: Dict, prefix: KeyPath, leaves: List[Tuple[KeyPath, object]]):
+    for key, value in record.items():
+        path = prefix + (key,)
+        if isinstance(value, dict) and value:
+            _flatten(value, path, leaves)
+        else:
+            leaves.append((path, value))
+
+
+def _encode_column(values: List) -> Tuple[str, bytes]:
+    """Pick the cheapest encoding that round-trips the column exactly"""
+    if all(isinstance(v, str) for v in values):
+        if len(set(values)) <= INTERN_RATIO * len(values):
+            table: Dict[str, int] = {}
+            indices = _intern(values, table)
+            names = _json(list(table))
+            return "interned", struct.pack("<I", len(names)) + names + _uint32s(indices)
+        return "str", _json(values)
+
+    if all(isinstance(v, list) and all(isinstance(x, str) for x in v) for v in values):
+        table = {}
+        indices = _intern((x for v in values for x in v), table)
+        names = _json(list(table))
+        return "strlist", (struct.pack("<I", len(names)) + names
+                           + _uint32s(len(v) for v in values) + _uint32s(indices))
+
+    return "json", _json(values)
+
+
+def write_archive(notices: Iterable[Dict], path: Path, codec: Optional[str] = None) -> int:
+    """Write notices to a columnar archive; returns how many were written"""
+    codec = codec or DEFAULT_CODEC
+    if codec not in ("zstd", "zlib"):
+        raise ValueError(f"Unknown codec: {codec}")
+
+    paths: Dict[KeyPath, int] = {}
+    columns: List[List] = []
+    shapes: Dict[Tuple[int, ...], int] = {}
+    record_shapes: List[int] = []
+    for notice in notices:
+        if not isinstance(notice, dict):
+            raise ValueError(f"Notices must be JSON objects, got {type(notice).__name__}")
+        leaves: List[Tuple[KeyPath, object]] = []
+        _flatten(notice, (), leaves)
+        shape = []
+        for leaf_path, value in leaves:
+            column = paths.setdefault(leaf_path, len(columns))
+            if column == len(columns):
+                columns.append([])
+            columns[column].append(value)
+            shape.append(column)
+        record_shapes.append(shapes.setdefault(tuple(shape), len(shapes)))
+
+    blocks: List[bytes] = []
+
+    def add_block(data: bytes) -> Dict[str, int]:
+        compressed = _compress(codec, data)
+        ref = {"offset": sum(len(b) for b in blocks), "length": len(compressed), "raw": len(data)}
+        blocks.append(compressed)
+        return ref
+
+    shape_table = _json([list(shape) for shape in shapes])
+    header = {
+        "version": 1,
+        "codec": codec,
+        "count": len(record_shapes),
+        "shapes": add_block(struct.pack("<I", len(shape_table)) + shape_table + _uint32s(record_shapes)),
+        "columns": [],
+    }
+    for leaf_path, column in paths.items():
+        kind, data = _encode_column(columns[column])
+        header["columns"].append({"path": list(leaf_path), "kind": kind, "rows": len(columns[column]),
+                                  **add_block(data)})
+
+    header_bytes = _json(header)
+    atomic_write_chunks(Path(path), [MAGIC, struct.pack("<I", len(header_bytes)), header_bytes, *blocks])
+    return len(record_shapes)
+
+
+# ==========================================
+# 📖 READER
+# ==========================================
+
+class NoticeArchive:
+    """
+    Reads an archive written by write_archive. Column names are dotted key
+    paths ("id", "meta.url", "ai_analysis.category"); a name also selects
+    every column below it ("meta" -> meta.title, meta.date, ...).
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        if self._file.read(len(MAGIC)) != MAGIC:
+            self._file.close()
+            raise ValueError(f"{self.path} is not a notice archive")
+        header_length, = struct.unpack("<I", self._file.read(4))
+        self.header = json.loads(self._file.read(header_length))
+        self._blocks_start = len(MAGIC) + 4 + header_length
+        self.codec = self.header["codec"]
+        self.count = self.header["count"]
+        self.columns = {".".join(c["path"]): c for c in self.header["columns"]}
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def _block(self, ref: Dict) -> bytes:
+        self._file.seek(self._blocks_start + ref["offset"])
+        return _decompress(self.codec, self._file.read(ref["length"]))
+
+    def _shapes(self) -> Tuple[List[List[int]], array.array]:
+        data = self._block(self.header["shapes"])
+        table_length, = struct.unpack_from("<I", data)
+        return json.loads(data[4:4 + table_length]), _read_uint32s(data[4 + table_length:])
+
+    def column(self, name: str) -> List:
+        """Values of one column, for the records that have it, in record order"""
+        spec = self.columns[name]
+        data = self._block(spec)
+        if spec["kind"] in ("str", "json"):
+            return json.loads(data)
+
+        names_length, = struct.unpack_from("<I", data)
+        names = json.loads(data[4:4 + names_length])
+        if spec["kind"] == "interned":
+            return [names[i] for i in _read_uint32s(data[4 + names_length:])]
+        # strlist: per-row lengths, then the flattened element indices
+        split = 4 + names_length + 4 * spec["rows"]
+        lengths = _read_uint32s(data[4 + names_length:split])
+        indices = iter(_read_uint32s(data[split:]))
+        return [[names[next(indices)] for _ in range(length)] for length in lengths]
+
+    def iter_records(self, columns: Optional[Iterable[str]] = None) -> Iterator[Dict]:
+        """
+        Rebuild the records, with keys in their original order. With
+        `columns`, only those fields are decompressed and returned; names
+        matching no column are ignored, as the field may simply never occur.
+        """
+        specs = self.header["columns"]
+        if columns is None:
+            wanted = range(len(specs))
+        else:
+            names = list(columns)
+            wanted = [n for n, spec in enumerate(specs)
+                      if any(".".join(spec["path"]) == name or ".".join(spec["path"]).startswith(name + ".")
+                             for name in names)]
+        values = {n: iter(self.column(".".join(specs[n]["path"]))) for n in wanted}
+
+        shapes, record_shapes = self._shapes()
+        for shape in record_shapes:
+            record: Dict = {}
+            for column in shapes[shape]:
+                if column in values:
+                    _assign(record, specs[column]["path"], next(values[column]))
+            yield record
+
+
+def _assign(record: Dict, path: List[str], value):
+    for key in path[:-1]:
+        record = record.setdefault(key, {})
+    record[path[-1]] = value
+
+
+def read_archive(path: Path, columns: Optional[Iterable[str]] = None) -> Iterator[Dict]:
+    """Records of an archive, optionally projected to `columns`"""
+    with NoticeArchive(path) as archive:
+        yield from archive.iter_records(columns)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from notice_stream import iter_notices, write_json_array
+
+    parser = argparse.ArgumentParser(description="Pack, unpack or inspect a columnar notice archive")
+    sub = parser.add_subparsers(dest="command", required=True)
+    pack = sub.add_parser("pack", help="archive a notices JSON/NDJSON file")
+    pack.add_argument("source", type=Path)
+    pack.add_argument("--out", type=Path, default=None)
+    pack.add_argument("--codec", choices=["zstd", "zlib"], default=None)
+    unpack = sub.add_parser("unpack", help="write an archive back out as a JSON array")
+    unpack.add_argument("archive", type=Path)
+    unpack.add_argument("--out", type=Path, required=True)
+    unpack.add_argument("--columns", nargs="+", default=None, help="only these fields, e.g. id file_hash")
+    info = sub.add_parser("info", help="list the columns of an archive")
+    info.add_argument("archive", type=Path)
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        out = args.out or args.source.with_suffix(ARCHIVE_SUFFIX)
+        count = write_archive(iter_notices(args.source), out, args.codec)
+        before, after = args.source.stat().st_size, out.stat().st_size
+        print(f"✅ Archived {count} notices into {out}: {before // 1024} KB -> {after // 1024} KB "
+              f"({before / max(after, 1):.1f}x smaller)")
+    elif args.command == "unpack":
+        count = write_json_array(args.out, read_archive(args.archive, args.columns))
+        print(f"✅ Wrote {count} notices to {args.out}")
+    else:
+        with NoticeArchive(args.archive) as archive:
+            print(f"📦 {archive.count} notices, codec {archive.codec}")
+            print(f"   {'column':<36}{'kind':<10}{'rows':>6}{'raw B':>9}{'stored B':>10}")
+            for name, spec in archive.columns.items():
+                print(f"   {name:<36}{spec['kind']:<10}{spec['rows']:>6}{spec['raw']:>9}{spec['length']:>10}")
@@ -0,0 +1,528 @@
+"""
+Local Full-Text Search over CITK Notices
+Inverted index over title, summary, keywords and content with BM25 ranking,
+prefix matching and category/date filters, stored in a compact binary file
+that is memory-mapped on load
+
+Build from processed notices and query it:
+    python backend_automation/notice_search.py build backend_automation/citk_master_database.json
+    python backend_automation/notice_search.py query "mid semester exam" --category Exam
+"""
+
+import array
+import heapq
+import math
+import mmap
+import re
+import struct
+import sys
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from crawl_cursor import parse_listing_date
+from local_cache import atomic_write_bytes, cache_path
+from notice_stream import iter_notices
+
+MAGIC = b"CITKIDX1"
+# magic, doc count, term count, category count, posting count, then
+# (offset, length) of every section in SECTIONS order
+SECTIONS = ("dates", "categories", "doc_id_offsets", "doc_ids", "category_offsets", "category_names",
+            "term_offsets", "terms", "posting_offsets", "posting_docs", "posting_impacts",
+            "lookup_docs", "lookup_impacts")
+HEADER = struct.Struct("<8sIIII" + "QQ" * len(SECTIONS))
+
+# Term frequency weight of each field, so a title hit outranks a body hit
+FIELD_WEIGHTS = (("title", 3.0), ("keywords", 2.0), ("summary", 1.5), ("content", 1.0))
+BM25_K1 = 1.2
+BM25_B = 0.75
+# A prefix like "sch" expands to at most this many indexed terms
+MAX_PREFIX_TERMS = 64
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+@dataclass
+class SearchHit:
+    id: str
+    score: float
+    date: Optional[str]
+    category: str
+
+
+def _analysis(notice: Dict) -> Dict:
+    # Some stored analyses are a one-element list rather than an object
+    analysis = notice.get('ai_analysis') or {}
+    if isinstance(analysis, list):
+        analysis = next((a for a in analysis if isinstance(a, dict)), {})
+    return analysis
+
+
+def _notice_fields(notice: Dict) -> Dict[str, str]:
+    meta = notice.get('meta') or {}
+    analysis = _analysis(notice)
+    return {
+        "title": meta.get('title') or notice.get('title', ''),
+        "keywords": " ".join(analysis.get('keywords') or []),
+        "summary": analysis.get('summary') or '',
+        "content": notice.get('content') or notice.get('text') or '',
+    }
+
+
+def _date_ordinal(value: Union[str, date, None]) -> int:
+    """Days since 0001-01-01, 0 for unknown"""
+    if value is None:
+        return 0
+    if isinstance(value, date):
+        return value.toordinal()
+    parsed = parse_listing_date(value)
+    return parsed.toordinal() if parsed else 0
+
+
+# ==========================================
+# 🏗️ BUILDING
+# ==========================================
+def build_index(notices: Iterable[Dict]) -> bytes:
+    """
+    Serialize an index over `notices`. BM25 contributions are computed at
+    build time and stored per posting ("impacts"). Each posting list is
+    stored twice: by impact, for top-k traversal, and by doc number, for
+    looking up one document's impact with a binary search.
+    """
+    _require_little_endian()
+    doc_ids: List[str] = []
+    dates = array.array('i')
+    categories = array.array('I')
+    category_ids: Dict[str, int] = {}
+    lengths: List[float] = []
+    term_freqs: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+
+    for notice in notices:
+        doc = len(doc_ids)
+        doc_ids.append(str(notice['id']))
+        meta = notice.get('meta') or {}
+        dates.append(_date_ordinal(meta.get('date') or notice.get('date')))
+        category = _analysis(notice).get('category') or 'General'
+        categories.append(category_ids.setdefault(category, len(category_ids)))
+
+        weighted: Counter = Counter()
+        fields = _notice_fields(notice)
+        for field, weight in FIELD_WEIGHTS:
+            for token in tokenize(fields[field]):
+                weighted[token] += weight
+        lengths.append(sum(weighted.values()))
+        for term, tf in weighted.items():
+            term_freqs[term].append((doc, tf))
+
+    doc_count = len(doc_ids)
+    avg_length = (sum(lengths) / doc_count) if doc_count else 0.0
+
+    terms = sorted(term_freqs, key=lambda t: t.encode('utf-8'))
+    posting_offsets = array.array('I', [0])
+    posting_docs = array.array('I')
+    posting_impacts = array.array('f')
+    lookup_docs = array.array('I')
+    lookup_impacts = array.array('f')
+    for term in terms:
+        postings = term_freqs[term]
+        idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+        scored = []
+        for doc, tf in postings:
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc] / avg_length) if avg_length else BM25_K1
+            scored.append((idf * tf * (BM25_K1 + 1) / (tf + norm), doc))
+        # Postings were appended in doc order
+        lookup_docs.extend(doc for _, doc in scored)
+        lookup_impacts.extend(impact for impact, _ in scored)
+        scored.sort(reverse=True)
+        posting_docs.extend(doc for _, doc in scored)
+        posting_impacts.extend(impact for impact, _ in scored)
+        posting_offsets.append(len(posting_docs))
+
+    doc_id_offsets, doc_id_blob = _string_table(doc_ids)
+    category_offsets, category_blob = _string_table(sorted(category_ids, key=category_ids.get))  # type: ignore
+    term_offsets, term_blob = _string_table(terms)
+
+    sections = {
+        "dates": dates.tobytes(),
+        "categories": categories.tobytes(),
+        "doc_id_offsets": doc_id_offsets.tobytes(),
+        "doc_ids": doc_id_blob,
+        "category_offsets": category_offsets.tobytes(),
+        "category_names": category_blob,
+        "term_offsets": term_offsets.tobytes(),
+        "terms": term_blob,
+        "posting_offsets": posting_offsets.tobytes(),
+        "posting_docs": posting_docs.tobytes(),
+        "posting_impacts": posting_impacts.tobytes(),
+        "lookup_docs": lookup_docs.tobytes(),
+        "lookup_impacts": lookup_impacts.tobytes(),
+    }
+    body = bytearray()
+    table = []
+    for name in SECTIONS:
+        data = sections[name]
+        # Keep every section 4-byte aligned for the memoryview casts on load
+        body.extend(b"\0" * (-(HEADER.size + len(body)) % 4))
+        table.extend((HEADER.size + len(body), len(data)))
+        body.extend(data)
+    header = HEADER.pack(MAGIC, doc_count, len(terms), len(category_ids), len(posting_docs), *table)
+    return header + bytes(body)
+
+
+def _require_little_endian():
+    # Sections are raw native arrays; the file format is fixed as little-endian
+    if sys.byteorder != "little":
+        raise RuntimeError("Notice search indexes are only supported on little-endian machines")
+
+
+def _string_table(strings: List[str]) -> Tuple[array.array, bytes]:
+    offsets = array.array('I', [0])
+    blob = bytearray()
+    for s in strings:
+        blob.extend(s.encode('utf-8'))
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+
+def write_index(notices: Iterable[Dict], path: Optional[Path] = None) -> Path:
+    path = Path(path) if path else cache_path("search", "notices.idx")
+    atomic_write_bytes(path, build_index(notices))
+    return path
+
+
+# ==========================================
+# 🔎 QUERYING
+# ==========================================
+class SearchIndex:
+    """Read-only view over an index file; nothing is decoded up front"""
+
+    def __init__(self, buffer):
+        _require_little_endian()
+        self._buffer = buffer
+        view = memoryview(buffer)
+        magic, self.doc_count, self.term_count, category_count, _, *table = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError("Not a CITK search index")
+
+        fmt = {"dates": 'i', "posting_impacts": 'f', "lookup_impacts": 'f',
+               "doc_ids": None, "category_names": None, "terms": None}
+        sections = {}
+        for i, name in enumerate(SECTIONS):
+            offset, length = table[2 * i], table[2 * i + 1]
+            raw = view[offset:offset + length]
+            code = fmt.get(name, 'I')
+            sections[name] = raw.cast(code) if code else raw
+        self.dates = sections["dates"]
+        self.categories = sections["categories"]
+        self._doc_id_offsets = sections["doc_id_offsets"]
+        self._doc_ids = sections["doc_ids"]
+        self._term_offsets = sections["term_offsets"]
+        self._terms = sections["terms"]
+        self._posting_offsets = sections["posting_offsets"]
+        self._posting_docs = sections["posting_docs"]
+        self._posting_impacts = sections["posting_impacts"]
+        self._lookup_docs = sections["lookup_docs"]
+        self._lookup_impacts = sections["lookup_impacts"]
+
+        names_offsets, names = sections["category_offsets"], sections["category_names"]
+        self.category_names = [
+            bytes(names[names_offsets[i]:names_offsets[i + 1]]).decode('utf-8') for i in range(category_count)
+        ]
+        self._category_ids = {name.lower(): i for i, name in enumerate(self.category_names)}
+        self._terms_view = _TermList(self)
+
+    @classmethod
+    def open(cls, path: Optional[Path] = None) -> "SearchIndex":
+        """Memory-map an index written by write_index"""
+        path = Path(path) if path else cache_path("search", "notices.idx")
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapped)
+
+    @classmethod
+    def from_notices(cls, notices: Iterable[Dict]) -> "SearchIndex":
+        return cls(build_index(notices))
+
+    # ---- lookups ----
+
+    def _term(self, i: int) -> bytes:
+        return bytes(self._terms[self._term_offsets[i]:self._term_offsets[i + 1]])
+
+    def _term_ids(self, token: str, prefix: bool) -> List[int]:
+        key = token.encode('utf-8')
+        start = bisect_left(self._terms_view, key)
+        if not prefix:
+            return [start] if start < self.term_count and self._term(start) == key else []
+        ids = []
+        i = start
+        while i < self.term_count and len(ids) < MAX_PREFIX_TERMS and self._term(i).startswith(key):
+            ids.append(i)
+            i += 1
+        return ids
+
+    def doc_id(self, doc: int) -> str:
+        return bytes(self._doc_ids[self._doc_id_offsets[doc]:self._doc_id_offsets[doc + 1]]).decode('utf-8')
+
+    def _hit(self, doc: int, score: float) -> SearchHit:
+        ordinal = self.dates[doc]
+        return SearchHit(
+            id=self.doc_id(doc),
+            score=round(score, 4),
+            date=date.fromordinal(ordinal).isoformat() if ordinal else None,
+            category=self.category_names[self.categories[doc]],
+        )
+
+    def search(self,
+               query: str,
+               limit: int = 10,
+               category: Optional[str] = None,
+               since: Union[str, date, None] = None,
+               until: Union[str, date, None] = None,
+               prefix: bool = True) -> List[SearchHit]:
+        """
+        Best `limit` notices for `query` by BM25. The last query word is
+        treated as a prefix (search-as-you-type) unless `prefix` is False.
+        `category` and the inclusive `since`/`until` dates filter results.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        category_id = None
+        if category is not None:
+            category_id = self._category_ids.get(category.lower())
+            if category_id is None:
+                return []
+        low = _date_ordinal(since) if since else None
+        high = _date_ordinal(until) if until else None
+        dates, categories = self.dates, self.categories
+
+        def accepts(doc: int) -> bool:
+            if category_id is not None and categories[doc] != category_id:
+                return False
+            if low is not None and dates[doc] < low:
+                return False
+            if high is not None and (dates[doc] == 0 or dates[doc] > high):
+                return False
+            return True
+
+        filtered = category_id is not None or low is not None or high is not None
+        groups = [self._term_ids(t, prefix and i == len(tokens) - 1) for i, t in enumerate(tokens)]
+        groups = [g for g in groups if g]
+        if not groups:
+            return []
+
+        # One word: its postings are already in score order, take the first matches
+        if len(groups) == 1:
+            hits, seen_docs = [], set()
+            for impact, doc in self._impact_stream(groups[0]):
+                if doc in seen_docs or (filtered and not accepts(doc)):
+                    continue
+                seen_docs.add(doc)
+                hits.append(self._hit(doc, impact))
+                if len(hits) >= limit:
+                    break
+            return hits
+
+        check = accepts if filtered else None
+        if all(len(group) == 1 for group in groups):
+            top = self._block_top_k([group[0] for group in groups], limit, check)
+        else:
+            top = self._threshold_top_k(groups, limit, check)
+        return [self._hit(doc, score) for score, doc in sorted(top, reverse=True)]
+
+    def _block_top_k(self, terms: List[int], limit: int, accepts) -> List[Tuple[float, int]]:
+        """
+        Top-k for words that each map to one term. Growing prefixes of the
+        impact-ordered postings are read until `limit` documents found in all
+        of them give a floor for the k-th score. A document can only reach
+        that floor if, in every list where the other lists' best impacts fall
+        short of it, its own impact makes up the difference - and such
+        documents form a prefix of that list. The answer lies in the
+        intersection of those prefixes, so the bulk of the work is done by
+        dict and set operations rather than per posting.
+        """
+        offsets, docs, impacts = self._posting_offsets, self._posting_docs, self._posting_impacts
+        ranges = [(offsets[t], offsets[t + 1]) for t in terms]
+        top: List[Tuple[float, int]] = []
+        scored = set()
+
+        def offer(score: float, doc: int):
+            if len(top) < limit:
+                heapq.heappush(top, (score, doc))
+            elif score > top[0][0]:
+                heapq.heapreplace(top, (score, doc))
+
+        # Postings read so far, as doc -> impact, and how far each list has been read
+        seen: List[Dict[int, float]] = [{} for _ in terms]
+        read = [lo for lo, _ in ranges]
+
+        def read_to(slot: int, end: int):
+            if end > read[slot]:
+                seen[slot].update(zip(docs[read[slot]:end].tolist(), impacts[read[slot]:end].tolist()))
+                read[slot] = end
+
+        depth = max(256, limit * 16)
+        while len(top) < limit:
+            if any(lo + depth >= hi for lo, hi in ranges):
+                # Too few documents have every word: walk the lists instead
+                return self._threshold_top_k([[t] for t in terms], limit, accepts)
+            for slot, (lo, _) in enumerate(ranges):
+                read_to(slot, lo + depth)
+            in_all = set(seen[0]).intersection(*seen[1:])
+            in_all.difference_update(scored)
+            scored.update(in_all)
+            for doc in in_all:
+                if accepts is None or accepts(doc):
+                    offer(sum(s[doc] for s in seen), doc)
+            depth *= 2
+
+        floor = top[0][0]
+        best = [impacts[lo] for lo, _ in ranges]
+        total_best = sum(best)
+        constrained = []
+        for slot, ((lo, hi), own_best) in enumerate(zip(ranges, best)):
+            needed = floor - (total_best - own_best)
+            if needed > 0:
+                read_to(slot, self._impact_cut(lo, hi, needed))
+                constrained.append(seen[slot])
+        if not constrained:
+            # No list can be cut short: walk them with the threshold algorithm
+            return self._threshold_top_k([[t] for t in terms], limit, accepts)
+
+        # Every constrained list was read at least to its cut, so this holds
+        # all documents that can still reach the floor (and perhaps a few more)
+        candidates = set(constrained[0]).intersection(*constrained[1:])
+        candidates.difference_update(scored)
+        for doc in candidates:
+            if accepts is None or accepts(doc):
+                offer(sum(s[doc] if doc in s else self._impact_of([t], doc)
+                          for s, t in zip(seen, terms)), doc)
+        return top
+
+    def _impact_cut(self, lo: int, hi: int, needed: float) -> int:
+        """End of the run of postings in [lo, hi) with impact >= needed (impacts descend)"""
+        impacts = self._posting_impacts
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if impacts[mid] >= needed:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _threshold_top_k(self, groups: List[List[int]], limit: int, accepts) -> List[Tuple[float, int]]:
+        """
+        Threshold algorithm, for queries whose prefix word expands to several
+        terms: walk every word's postings in impact order, scoring each newly
+        seen document in full via the doc-ordered copies, and stop once the
+        k-th best score beats anything unseen
+        """
+        streams = [self._impact_stream(group) for group in groups]
+        heads = [next(stream, None) for stream in streams]
+        seen = set()
+        top: List[Tuple[float, int]] = []
+        while True:
+            live = [head for head in heads if head is not None]
+            if not live:
+                break
+            threshold = sum(impact for impact, _ in live)
+            if len(top) >= limit and top[0][0] >= threshold:
+                break
+            for slot, head in enumerate(heads):
+                if head is None:
+                    continue
+                impact, doc = head
+                if doc not in seen:
+                    seen.add(doc)
+                    if accepts is None or accepts(doc):
+                        score = impact + sum(
+                            self._impact_of(group, doc) for other, group in enumerate(groups) if other != slot
+                        )
+                        if len(top) < limit:
+                            heapq.heappush(top, (score, doc))
+                        elif score > top[0][0]:
+                            heapq.heapreplace(top, (score, doc))
+                heads[slot] = next(streams[slot], None)
+        return top
+
+    def _impact_stream(self, terms: List[int]) -> Iterator[Tuple[float, int]]:
+        """(impact, doc) in descending impact over the postings of `terms`"""
+        offsets, docs, impacts = self._posting_offsets, self._posting_docs, self._posting_impacts
+        lists = [zip(impacts[offsets[t]:offsets[t + 1]], docs[offsets[t]:offsets[t + 1]]) for t in terms]
+        if len(lists) == 1:
+            return iter(lists[0])
+        # Prefix expansions of one word share a slot, so a doc may show up
+        # once per expansion; the first (highest) one wins via `seen`
+        return heapq.merge(*lists, reverse=True)
+
+    def _impact_of(self, terms: List[int], doc: int) -> float:
+        """Best impact of `doc` among `terms`, 0 if it contains none of them"""
+        best = 0.0
+        offsets, docs = self._posting_offsets, self._lookup_docs
+        for term in terms:
+            lo, hi = offsets[term], offsets[term + 1]
+            i = bisect_left(docs, doc, lo, hi)
+            if i < hi and docs[i] == doc and self._lookup_impacts[i] > best:
+                best = self._lookup_impacts[i]
+        return best
+
+
+class _TermList:
+    """Sequence view of the sorted term table, for bisect"""
+
+    def __init__(self, index: SearchIndex):
+        self.index = index
+
+    def __len__(self):
+        return self.index.term_count
+
+    def __getitem__(self, i: int) -> bytes:
+        return self.index._term(i)
+
+
+def load_notices(path: Path) -> List[Dict]:
+    """processed_notices.json/.ndjson or citk_master_database.json (list, or {"notices": [...]})"""
+    return list(iter_notices(path))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or query the local notice search index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="index a notices JSON file")
+    build.add_argument("source", type=Path)
+    build.add_argument("--out", type=Path, default=None)
+    query = sub.add_parser("query", help="search an index")
+    query.add_argument("text")
+    query.add_argument("--index", type=Path, default=None)
+    query.add_argument("--category", default=None)
+    query.add_argument("--since", default=None, help="DD-MM-YYYY or YYYY-MM-DD")
+    query.add_argument("--until", default=None)
+    query.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        notices = load_notices(args.source)
+        path = write_index(notices, args.out)
+        print(f"✅ Indexed {len(notices)} notices into {path} ({path.stat().st_size // 1024} KB)")
+    else:
+        index = SearchIndex.open(args.index)
+        started = time.perf_counter()
+        hits = index.search(args.text, args.limit, args.category, args.since, args.until)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"🔎 {len(hits)} results in {elapsed:.2f} ms")
+        for hit in hits:
+            print(f"   {hit.score:7.3f}  {hit.date or 'undated':<10}  {hit.category:<12}  {hit.id}")
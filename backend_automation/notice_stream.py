@@ -0,0 +1,162 @@
+"""
+Streaming Notice Storage
+JSON-lines (NDJSON) reader and checkpointing writer, plus an incremental
+reader/writer for the legacy JSON array files, so notice sets flow through
+the pipeline one record at a time
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Set
+
+from local_cache import atomic_write_chunks
+
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+READ_CHUNK = 64 * 1024
+
+
+def iter_notices(path: Path) -> Iterator[Dict]:
+    """Notices from an NDJSON, JSON array or columnar archive file, without loading the whole file"""
+    path = Path(path)
+    if path.suffix in NDJSON_SUFFIXES:
+        return read_ndjson(path)
+    if path.suffix == ".citkarc":
+        from notice_archive import read_archive
+        return read_archive(path)
+    return iter_json_array(path)
+
+
+def iter_json_array(path: Path) -> Iterator[Dict]:
+    """Elements of a top-level JSON array, decoded as the file is read in chunks"""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = f.read(READ_CHUNK).lstrip()
+        if not buffer:
+            return
+        if buffer.startswith('{'):
+            # {"notices": [...]} wrapper: not streamable, load it whole
+            yield from json.loads(buffer + f.read()).get('notices', [])
+            return
+        if not buffer.startswith('['):
+            raise ValueError(f"{path} is not a JSON array")
+
+        pos, eof = 1, False
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == ']':
+                return
+            try:
+                if pos == len(buffer):
+                    raise ValueError("buffer exhausted")
+                item, pos = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                # Element runs past the buffer: read more and retry
+                if eof:
+                    raise ValueError(f"{path} is truncated or not valid JSON")
+                more = f.read(READ_CHUNK)
+                eof = not more
+                buffer, pos = buffer[pos:] + more, 0
+                continue
+            yield item
+
+
+def read_ndjson(path: Path) -> Iterator[Dict]:
+    """Records of a JSON-lines file; a torn last line (crash mid-write) is ignored"""
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                if line.endswith(b'\n'):
+                    raise
+                print(f"⚠️  Ignoring incomplete last record in {path}")
+
+
+def completed_ids(path: Path) -> Set[str]:
+    """Ids already written to an NDJSON output, for resuming an interrupted run"""
+    path = Path(path)
+    if not path.exists():
+        return set()
+    return {record['id'] for record in read_ndjson(path) if 'id' in record}
+
+
+class NDJSONWriter:
+    """
+    Appends one record per line and flushes it straight away, so every
+    finished notice survives a crash. With `durable` each line is also
+    fsync'd. Reopening in append mode first drops a torn last line.
+    """
+
+    def __init__(self, path: Path, append: bool = True, durable: bool = False):
+        self.path = Path(path)
+        self.durable = durable
+        self.count = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if append and self.path.exists():
+            _trim_torn_tail(self.path)
+        self._file = open(self.path, 'ab' if append else 'wb')
+
+    def write(self, record: Dict):
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n')
+        self._file.flush()
+        if self.durable:
+            os.fsync(self._file.fileno())
+        self.count += 1
+
+    def write_all(self, records: Iterable[Dict]) -> Iterator[Dict]:
+        """Pass-through generator that checkpoints each record as it goes by"""
+        for record in records:
+            self.write(record)
+            yield record
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _trim_torn_tail(path: Path):
+    with open(path, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b'\n':
+            return
+        # Walk back to the last complete line
+        end = size
+        while end > 0:
+            start = max(0, end - READ_CHUNK)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b'\n')
+            if newline != -1:
+                f.truncate(start + newline + 1)
+                return
+            end = start
+        f.truncate(0)
+
+
+def write_json_array(path: Path, records: Iterable[Dict]) -> int:
+    """
+    Stream records into a pretty-printed JSON array (same layout as
+    json.dumps(list, indent=2)), replacing `path` atomically. Returns the count.
+    """
+    count = [0]
+
+    def chunks():
+        yield b"["
+        for record in records:
+            yield (b",\n  " if count[0] else b"\n  ") + json.dumps(record, indent=2).replace("\n", "\n  ").encode('utf-8')
+            count[0] += 1
+        yield b"\n]" if count[0] else b"]"
+
+    atomic_write_chunks(path, chunks())
+    return count[0]
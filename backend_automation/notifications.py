@@ -0,0 +1,217 @@
+"""
+Notification Dispatcher for CITK Notices
+Routes pushes to per-audience and per-category FCM topics, coalesces bursts
+into a digest and sends them with send_each from a background thread
+"""
+
+import os
+import queue
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from metrics import Metrics, get_metrics
+
+# FCM accepts at most 500 messages per send_each call
+FCM_BATCH_SIZE = 500
+# A route with at least this many notices in one burst gets a single digest push
+DIGEST_THRESHOLD = int(os.environ.get("NOTIFY_DIGEST_THRESHOLD", "3"))
+# How long to keep collecting after the last notice before sending the burst
+COALESCE_SECONDS = float(os.environ.get("NOTIFY_COALESCE_SECONDS", "2"))
+# Audience values meaning "everyone" go to this topic
+BROADCAST_TOPIC = "all"
+BROADCAST_AUDIENCES = {"all", "all_students", "everyone", "students"}
+# FCM conditions may combine at most five topics
+MAX_CONDITION_TOPICS = 5
+DIGEST_MAX_IDS = 20
+
+
+def topic_name(prefix: str, value: str) -> Optional[str]:
+    """FCM-safe topic for a free-text audience or category, e.g. 'audience_b_tech'"""
+    slug = re.sub(r"[^a-z0-9]+", "_", str(value).lower()).strip("_")
+    return f"{prefix}_{slug}"[:900] if slug else None
+
+
+def _analysis(record: Dict) -> Dict:
+    analysis = record.get('ai_analysis') or {}
+    if isinstance(analysis, list):
+        analysis = next((a for a in analysis if isinstance(a, dict)), {})
+    return analysis
+
+
+def notice_topics(record: Dict) -> Tuple[str, ...]:
+    """Topics a notice is delivered to: its audiences and its category"""
+    analysis = _analysis(record)
+    audiences = analysis.get('target_audience') or []
+    if isinstance(audiences, str):
+        audiences = [audiences]
+
+    topics = set()
+    for audience in audiences:
+        topic = topic_name("audience", audience)
+        if topic is None:
+            continue
+        if topic[len("audience_"):] in BROADCAST_AUDIENCES:
+            return (BROADCAST_TOPIC,)
+        topics.add(topic)
+    # Category values can be compound ("Exam/Academic")
+    for category in re.split(r"[/,]", str(analysis.get('category') or '')):
+        topic = topic_name("category", category)
+        if topic:
+            topics.add(topic)
+    return tuple(sorted(topics)) or (BROADCAST_TOPIC,)
+
+
+def _targets(topics: Tuple[str, ...]) -> List[Dict[str, str]]:
+    """Message target kwargs: one topic, or OR-conditions of up to five topics"""
+    if len(topics) == 1:
+        return [{"topic": topics[0]}]
+    return [
+        {"condition": " || ".join(f"'{t}' in topics" for t in topics[i:i + MAX_CONDITION_TOPICS])}
+        for i in range(0, len(topics), MAX_CONDITION_TOPICS)
+    ]
+
+
+class NotificationDispatcher:
+    """
+    Queue notices with submit(); a background thread groups each burst by
+    route, turns busy routes into one digest, and sends everything with
+    messaging.send_each. flush() blocks until the queue has been sent.
+    """
+
+    def __init__(self,
+                 digest_threshold: int = DIGEST_THRESHOLD,
+                 coalesce_seconds: float = COALESCE_SECONDS,
+                 metrics: Optional[Metrics] = None):
+        self.digest_threshold = digest_threshold
+        self.coalesce_seconds = coalesce_seconds
+        self.metrics = metrics or get_metrics()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, record: Dict):
+        self._ensure_thread()
+        self._queue.put(record)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Send everything submitted so far; False if it did not finish in time"""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def _ensure_thread(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="notification-dispatcher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        pending: List[Dict] = []
+        while True:
+            try:
+                item = self._queue.get(timeout=self.coalesce_seconds if pending else None)
+            except queue.Empty:
+                # Quiet for a while: the burst is over
+                self._send(pending)
+                pending = []
+                continue
+            if isinstance(item, threading.Event):
+                self._send(pending)
+                pending = []
+                item.set()
+                continue
+            pending.append(item)
+            if len(pending) >= FCM_BATCH_SIZE:
+                self._send(pending)
+                pending = []
+
+    # ---- building and sending ----
+
+    def build_messages(self, records: List[Dict]) -> List:
+        from firebase_admin import messaging
+
+        routes: Dict[Tuple[str, ...], List[Dict]] = defaultdict(list)
+        for record in records:
+            routes[notice_topics(record)].append(record)
+
+        messages = []
+        for topics, group in routes.items():
+            for target in _targets(topics):
+                if len(group) >= self.digest_threshold:
+                    titles = "; ".join(r['meta']['title'][:60] for r in group[:5])
+                    more = f" (+{len(group) - 5} more)" if len(group) > 5 else ""
+                    messages.append(messaging.Message(
+                        notification=messaging.Notification(
+                            title=f"📢 {len(group)} new notices",
+                            body=titles + more,
+                        ),
+                        data={
+                            "click_action": "FLUTTER_NOTIFICATION_CLICK",
+                            "notice_ids": ",".join(r['id'] for r in group[:DIGEST_MAX_IDS]),
+                        },
+                        **target,
+                    ))
+                    continue
+                for record in group:
+                    analysis = _analysis(record)
+                    messages.append(messaging.Message(
+                        notification=messaging.Notification(
+                            title=f"📢 {analysis.get('category', 'General')} Update",
+                            body=analysis.get('summary', record['meta']['title']),
+                        ),
+                        data={
+                            "click_action": "FLUTTER_NOTIFICATION_CLICK",
+                            "notice_id": record['id'],
+                        },
+                        **target,
+                    ))
+        return messages
+
+    def _send(self, records: List[Dict]):
+        if not records:
+            return
+        from firebase_admin import messaging
+
+        try:
+            messages = self.build_messages(records)
+        except Exception as e:
+            print(f"      ⚠️ Push failed: {e}")
+            self.metrics.inc("push_failed", len(records), pipeline="notify")
+            return
+
+        sent = failed = 0
+        for start in range(0, len(messages), FCM_BATCH_SIZE):
+            chunk = messages[start:start + FCM_BATCH_SIZE]
+            try:
+                with self.metrics.time("fcm_send_each", pipeline="notify"):
+                    response = messaging.send_each(chunk)
+                sent += response.success_count
+                failed += response.failure_count
+                for message, result in zip(chunk, response.responses):
+                    if not result.success:
+                        target = message.topic or message.condition
+                        print(f"      ⚠️ Push to {target} failed: {result.exception}")
+            except Exception as e:
+                failed += len(chunk)
+                print(f"      ⚠️ Push failed: {e}")
+
+        self.metrics.inc("push_sent", sent, pipeline="notify")
+        self.metrics.inc("push_failed", failed, pipeline="notify")
+        print(f"      🚀 {sent} push messages sent for {len(records)} notices"
+              + (f" ({failed} failed)" if failed else ""))
+
+
+_dispatcher: Optional[NotificationDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> NotificationDispatcher:
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = NotificationDispatcher()
+        return _dispatcher
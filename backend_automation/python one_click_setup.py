@@ -117,11 +117,10 @@ def create_collections(db):
     
     # Collection 3: search_index
     print("   Creating search_index...")
-    db.collection("search_index").document("notices_index").set({
-        "entries": [],
-        "total_count": 0,
+    db.collection("search_index").document("manifest").set({
+        "shards": {},
         "updated_at": datetime.now()
-    })
+    }, merge=True)
     print("   ✅ search_index created")
     
     # Collection 4: chat_history (for AI chat logs)
@@ -218,25 +217,39 @@ def upload_sample_notices(db):
     batch.commit()
     print(f"   ✅ Uploaded {len(sample_notices)} sample notices")
     
-    # Update search index
-    index_entries = [
-        {
+    # Update search index: one shard per notice month, listed in the manifest
+    shards = {}
+    for n in sample_notices:
+        try:
+            month = datetime.strptime(n['meta']['date'], "%d-%m-%Y").strftime("%Y-%m")
+        except ValueError:
+            month = "undated"
+        shards.setdefault(month, {})[n['id']] = {
             "id": n['id'],
             "title": n['meta']['title'],
             "category": n['ai_analysis']['category'],
             "keywords": n['ai_analysis']['keywords'],
+            "summary": n['ai_analysis']['summary'],
             "date": n['meta']['date'],
             "importance": n['ai_analysis']['is_important']
         }
-        for n in sample_notices
-    ]
     
-    db.collection("search_index").document("notices_index").set({
-        "entries": index_entries,
-        "total_count": len(index_entries),
-        "updated_at": datetime.now()
-    })
-    print(f"   ✅ Search index updated")
+    now = datetime.now()
+    manifest = {}
+    for month, entries in shards.items():
+        doc_id = f"notices_{month.replace('-', '_')}"
+        db.collection("search_index").document(doc_id).set({
+            "entries": entries,
+            "month": month,
+            "count": len(entries),
+            "updated_at": now
+        }, merge=True)
+        manifest[month] = {"doc": doc_id, "count": len(entries), "updated_at": now}
+    db.collection("search_index").document("manifest").set({
+        "shards": manifest,
+        "updated_at": now
+    }, merge=True)
+    print(f"   ✅ Search index updated ({len(shards)} month shards)")
 
 # ============================================================================
 # STEP 4: VERIFY SETUP
@@ -267,10 +280,11 @@ def verify_setup(db):
         checks.append(False)
     
     # Check 3: search_index
-    index = db.collection("search_index").document("notices_index").get()
+    index = db.collection("search_index").document("manifest").get()
     if index.exists:
-        data = index.to_dict()
-        print(f"   ✅ search_index exists ({data.get('total_count', 0)} entries)")
+        shards = (index.to_dict() or {}).get("shards", {})
+        total = sum(shard.get("count", 0) for shard in shards.values())
+        print(f"   ✅ search_index exists ({total} entries in {len(shards)} shards)")
         checks.append(True)
     else:
         print("   ❌ search_index missing")
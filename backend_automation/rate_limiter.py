@@ -0,0 +1,99 @@
+"""
+Rate-Limit-Aware Scheduling for Gemini Calls
+Token buckets for requests-per-minute and tokens-per-minute quotas, plus a
+shared backoff that every worker respects after a 429
+"""
+
+import os
+import random
+import threading
+import time
+
+GEMINI_RPM = float(os.environ.get("GEMINI_RPM", "15"))
+GEMINI_TPM = float(os.environ.get("GEMINI_TPM", "1000000"))
+
+
+class TokenBucket:
+    """Classic token bucket; `acquire` blocks until enough tokens are available"""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0):
+        # A request bigger than the whole bucket would wait forever
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.refill_per_second
+            time.sleep(wait)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Gemini reports quota exhaustion as ResourceExhausted / HTTP 429"""
+    return type(error).__name__ in ("ResourceExhausted", "TooManyRequests") or "429" in str(error)
+
+
+def is_token_limit_error(error: Exception) -> bool:
+    """
+    The request was rejected for being longer than the model accepts. TPM
+    quota 429s also mention token counts and limits, but are not size errors.
+    """
+    if is_rate_limit_error(error):
+        return False
+    message = str(error).lower()
+    return "token" in message and any(word in message for word in ("limit", "exceed", "too long", "maximum"))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough prompt size: ~4 characters per token, plus room for the reply"""
+    return len(text) // 4 + 512
+
+
+class GeminiRateLimiter:
+    """Requests-per-minute and tokens-per-minute quotas shared by all workers"""
+
+    def __init__(self, rpm: float = GEMINI_RPM, tpm: float = GEMINI_TPM,
+                 base_backoff: float = 2.0, max_backoff: float = 60.0):
+        self.requests = TokenBucket(rpm, rpm / 60.0)
+        self.tokens = TokenBucket(tpm, tpm / 60.0)
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.throttled = 0
+
+        self._lock = threading.Lock()
+        self._strikes = 0
+        self._paused_until = 0.0
+
+    def acquire(self, estimated_tokens: int):
+        """Wait for any active backoff, then for both quotas"""
+        while True:
+            with self._lock:
+                wait = self._paused_until - time.monotonic()
+            if wait <= 0:
+                break
+            time.sleep(wait)
+        self.requests.acquire(1)
+        self.tokens.acquire(estimated_tokens)
+
+    def record_rate_limited(self):
+        """After a 429: pause every worker with jittered exponential backoff"""
+        with self._lock:
+            self.throttled += 1
+            self._strikes += 1
+            delay = min(self.max_backoff, self.base_backoff * (2 ** (self._strikes - 1)))
+            delay *= random.uniform(0.5, 1.0)
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+
+    def record_success(self):
+        with self._lock:
+            self._strikes = 0
@@ -1,8 +1,13 @@
 import json
 import os
+import shutil
 from pathlib import Path
 from ai_data_processor import CITKDataProcessor
 from firebase_uploader import CITKFirebaseUploader
+from local_cache import cache_path
+from metrics import get_metrics
+from notice_search import write_index
+from notice_stream import NDJSONWriter, completed_ids, iter_notices, write_json_array
 
 def main():
     print("🚀 CITK AI Data Automation Pipeline")
@@ -66,35 +71,40 @@ def main():
         notices_file.write_text(json.dumps(sample_notices, indent=2))
         print("✅ Created sample notices file")
     
-    # Load notices
-    with open(notices_file, 'r', encoding='utf-8') as f:
-        raw_data = json.load(f)
-    
-    # Check if it's a list or dict with notices
-    if isinstance(raw_data, dict):
-        raw_notices = raw_data.get('notices', [])
-    else:
-        raw_notices = raw_data
-    
-    print(f"Found {len(raw_notices)} notices to process")
+    # Notices are streamed from the file (JSON array or NDJSON), never loaded whole
+    raw_notices = iter_notices(notices_file)
     
     # Step 2: Process notices
     print("\n🤖 Step 2: Processing with AI...")
-    processed_notices = processor.batch_process_notices(raw_notices)
+    workers = int(os.environ.get('PROCESSOR_WORKERS', '4'))
+    batch_size = int(os.environ.get('PROCESSOR_BATCH_SIZE', '8'))
+    
+    # Every finished notice is appended to the checkpoint straight away; a
+    # crashed run leaves it behind and the next run resumes from it
+    checkpoint_path = cache_path("checkpoints", "processed_notices.ndjson")
+    done = completed_ids(checkpoint_path)
+    if done:
+        print(f"♻️  Resuming: {len(done)} notices already processed by an interrupted run")
+    with NDJSONWriter(checkpoint_path) as checkpoint:
+        for record in processor.iter_process_notices(raw_notices, workers=workers, batch_size=batch_size, done=done):
+            checkpoint.write(record)
     
-    # Save locally
-    output_path = Path("processed_notices.json")
-    output_path.write_text(json.dumps(processed_notices, indent=2))
-    print(f"✅ Saved {len(processed_notices)} notices to {output_path}")
+    # Run finished: the checkpoint becomes the output, plus the legacy JSON export
+    output_path = Path("processed_notices.ndjson")
+    shutil.move(str(checkpoint_path), str(output_path))
+    processed_count = write_json_array(Path("processed_notices.json"), iter_notices(output_path))
+    print(f"✅ Saved {processed_count} notices to {output_path} and processed_notices.json")
+    index_path = write_index(iter_notices(output_path))
+    print(f"🔎 Local search index written to {index_path}")
     
-    if len(processed_notices) == 0:
+    if processed_count == 0:
         print("⚠️  No notices were processed. Check your input data format.")
         return
     
     # Step 3: Upload to Firebase
     print("\n☁️  Step 3: Uploading to Firebase...")
-    uploader.upload_notices(processed_notices)
-    uploader.create_search_index(processed_notices)
+    uploader.upload_notices(iter_notices(output_path))
+    uploader.create_search_index(iter_notices(output_path))
     
     # Step 4: Upload knowledge base
     print("\n📚 Step 4: Uploading Knowledge Base...")
@@ -258,11 +268,14 @@ def main():
     print("\n✅ All Done! Data is now in Firebase")
     print("=" * 50)
     print(f"\n📊 Summary:")
-    print(f"   - Notices processed: {len(processed_notices)}")
+    print(f"   - Notices processed: {processed_count}")
+    cache_stats = processor.analysis_cache.stats()
+    print(f"   - AI cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
     print(f"   - Knowledge base: ✅ Uploaded")
     print(f"   - Search index: ✅ Created")
     print(f"\n🔗 Check your Firebase Console:")
     print(f"   https://console.firebase.google.com")
+    get_metrics().flush("automation")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,101 @@
+"""
+Upload Manifest for Diff Uploads
+Remembers a content digest for every document written to Firestore, so
+unchanged documents can be skipped on the next upload
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from local_cache import cache_path
+
+# Fields that change on every run without the notice itself changing
+VOLATILE_FIELDS = ("meta.created_at", "timestamp", "updated_at")
+
+
+def document_digest(data: Dict, ignore: Tuple[str, ...] = VOLATILE_FIELDS) -> str:
+    """SHA-1 of the document's canonical JSON, minus the `ignore` (dotted) fields"""
+    stripped = dict(data)
+    for dotted in ignore:
+        parent, _, leaf = dotted.rpartition(".")
+        if parent:
+            if isinstance(stripped.get(parent), dict):
+                stripped[parent] = {k: v for k, v in stripped[parent].items() if k != leaf}
+        else:
+            stripped.pop(leaf, None)
+    canonical = json.dumps(stripped, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+class UploadManifest:
+    """SQLite map of (collection, doc id) -> digest of what was last uploaded"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else cache_path("upload_manifest.sqlite")
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS digests (
+                    collection TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    digest TEXT NOT NULL,
+                    uploaded_at REAL NOT NULL,
+                    PRIMARY KEY (collection, doc_id)
+                )
+            """)
+
+    def digests(self, collection: str) -> Dict[str, str]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT doc_id, digest FROM digests WHERE collection = ?", (collection,)
+            ).fetchall()
+        return dict(rows)
+
+    def select_changed(self, collection: str, docs: Iterable[Tuple[str, Dict]],
+                       pending: Dict[str, str]) -> Iterator[Tuple[str, Dict]]:
+        """
+        Yields only new or changed documents. Their digests are collected in
+        `pending`, to be recorded once the writes have gone through.
+        """
+        known = self.digests(collection)
+        for doc_id, data in docs:
+            digest = document_digest(data)
+            if known.get(doc_id) == digest:
+                continue
+            pending[doc_id] = digest
+            yield doc_id, data
+
+    def record(self, collection: str, digests: Dict[str, str]):
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?)",
+                [(collection, doc_id, digest, now) for doc_id, digest in digests.items()],
+            )
+
+    def forget(self, collection: str):
+        """Drop a collection's digests, forcing the next upload to write everything"""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM digests WHERE collection = ?", (collection,))
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+_manifest: Optional[UploadManifest] = None
+_manifest_lock = threading.Lock()
+
+
+def get_upload_manifest() -> UploadManifest:
+    global _manifest
+    with _manifest_lock:
+        if _manifest is None:
+            _manifest = UploadManifest()
+        return _manifest
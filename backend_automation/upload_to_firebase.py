@@ -1,7 +1,9 @@
 import firebase_admin
 from firebase_admin import credentials, firestore
-import json
 import os
+from firestore_writer import FirestoreWriter
+from notice_stream import iter_notices
+from upload_manifest import get_upload_manifest
 
 # --- CONFIGURATION ---
 # This is the file you just copied over
@@ -9,7 +11,8 @@ JSON_FILE = "backend_automation/citk_master_database.json"
 # This is your key (it should already be there)
 KEY_FILE = "backend_automation/service-account.json"
 
-def upload_now():
+def upload_now(full=False):
+    """Uploads the master database; unless `full`, unchanged notices are skipped."""
     print("🔥 Connecting to Firebase...")
     
     # 1. Login
@@ -24,37 +27,24 @@ def upload_now():
         print(f"❌ Error: Could not find {JSON_FILE}")
         return
 
-    with open(JSON_FILE, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-        print(f"📂 Loaded {len(data)} notices.")
+    # 3. Upload in Batches (several in flight; failures are reported per notice).
+    # Notices are streamed off disk, so memory stays flat however big the file is.
+    print(f"🚀 Uploading from {JSON_FILE}...")
+    writer = FirestoreWriter(db, batch_size=400)
+    manifest = None if full else get_upload_manifest()
+    report = writer.write("live_notices", ((item['id'], item) for item in iter_notices(JSON_FILE)),
+                          merge=True, manifest=manifest)
+    report.print_summary("notices")
 
-    # 3. Upload in Batches
-    batch = db.batch()
-    count = 0
-    total = 0
-
-    print("🚀 Uploading...")
-    for item in data:
-        # Create a reference with the unique ID
-        doc_ref = db.collection("live_notices").document(item['id'])
-        
-        # Add to batch
-        batch.set(doc_ref, item, merge=True)
-        count += 1
-        total += 1
-
-        # Commit every 400 items
-        if count >= 400:
-            batch.commit()
-            print(f"   💾 Saved {total} notices...")
-            batch = db.batch()
-            count = 0
-
-    # Final commit
-    if count > 0:
-        batch.commit()
-    
-    print(f"🎉 SUCCESS! {total} notices are now live in your App.")
+    if not report.failed and not report.written:
+        print("🎉 Nothing changed since the last upload.")
+    elif not report.failed:
+        print(f"🎉 SUCCESS! {report.written} notices are now live in your App.")
 
 if __name__ == "__main__":
-    upload_now()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Upload the master notice database to Firestore")
+    parser.add_argument("--full", action="store_true", help="re-write every notice, even unchanged ones")
+    args = parser.parse_args()
+    upload_now(full=args.full)
\ No newline at end of file